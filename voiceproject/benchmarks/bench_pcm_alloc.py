@@ -0,0 +1,162 @@
+# benchmarks/bench_pcm_alloc.py
+"""
+tracemalloc benchmark: bytes allocated per second of audio on the PCM hot paths,
+baseline (one dict + send per mic frame / bytearray +=) vs AudioLoop (frames queued
+behind a slow send are joined into one; TTS coalesced in a PcmRing).
+
+    cd voiceproject && python benchmarks/bench_pcm_alloc.py [--seconds 10] [--burst 1]
+
+--burst N queues N mic frames before the sender runs (a slow upstream socket).
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voiceproject.settings")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")  # client is never used
+
+import django  # noqa: E402
+
+django.setup()
+
+from fake_gemini import FakeSession  # noqa: E402
+from voiceapp.utils import AudioLoop, EMIT_CHUNK, RECV_RATE, SEND_RATE  # noqa: E402
+
+MIC_FRAME = SEND_RATE * 2 // 50   # 20 ms of 16 kHz PCM16
+TTS_CHUNK = RECV_RATE * 2 // 20   # 50 ms of 24 kHz PCM16
+
+
+# ---------------- baseline (pre-ring) implementations ----------------
+class LegacyPaths:
+    def __init__(self):
+        self.to_send = asyncio.Queue(maxsize=20)
+        self.session = FakeSession()
+        self._out_buf = bytearray()
+        self._last_emit = 0.0
+        self.last_event = None
+        self.last_json = None
+
+    async def push_client_audio(self, pcm_bytes, mime_type):
+        await self.to_send.put({"data": pcm_bytes, "mime_type": mime_type})
+
+    async def send_next(self):
+        item = await self.to_send.get()
+        await self.session.send(input=item)
+
+    async def emit(self, pcm_bytes):
+        self._out_buf += pcm_bytes
+        elapsed = time.time() - (self._last_emit or 0.0)
+        if len(self._out_buf) >= EMIT_CHUNK or elapsed > 0.2:
+            b64 = base64.b64encode(self._out_buf).decode("ascii")
+            event = {"type": "audio.message", "mime": f"audio/pcm;rate={RECV_RATE}", "data": b64}
+            # pre-encoding, the (single) consumer serialized each event itself; AudioLoop now does it once
+            text = json.dumps(
+                {"type": "audio", "mime": event["mime"], "data": b64, "rate": RECV_RATE},
+                separators=(",", ":"),
+            )
+            # like the AudioLoop sink: the previous message stays alive until this one is built
+            self.last_event, self.last_json = event, text
+            self._out_buf = bytearray()
+            self._last_emit = time.time()
+
+
+def audioloop_paths():
+    loop = AudioLoop(None, None, True, "bench", cache=None, tools=None)
+    loop.session = FakeSession()
+
+    async def sink(event):
+        loop.last_event = event
+
+    loop._broadcast = sink
+    return loop
+
+
+# ---------------- measurement ----------------
+class AllocMeter:
+    """Sums tracemalloc peaks above the pre-call baseline, one awaited call at a time."""
+
+    def __init__(self):
+        self.total = 0
+        self.enabled = False
+
+    async def __call__(self, awaitable):
+        if not self.enabled:
+            return await awaitable
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = await awaitable
+        self.total += tracemalloc.get_traced_memory()[1] - before
+        return result
+
+
+async def run(seconds: float, burst: int) -> dict:
+    mic = os.urandom(MIC_FRAME)
+    tts = os.urandom(TTS_CHUNK)
+    mime = f"audio/pcm;rate={SEND_RATE}"
+    n_mic = int(seconds * 50) // burst
+    n_tts = int(seconds * 20)
+    results = {}
+
+    for name, impl in (("baseline", LegacyPaths()), ("audioloop", audioloop_paths())):
+        if name == "baseline":
+            push, send, emit = impl.push_client_audio, impl.send_next, impl.emit
+        else:
+            push, send, emit = impl.push_client_audio, impl._send_next, impl._emit_audio_to_clients
+
+        ingest_meter, emit_meter = AllocMeter(), AllocMeter()
+
+        async def ingest_step():
+            for _ in range(burst):
+                await ingest_meter(push(mic, mime))
+            while not impl.to_send.empty() or getattr(impl, "_carry", None):
+                await ingest_meter(send())
+
+        async def emit_step():
+            await emit_meter(emit(tts))
+
+        async def run_all():
+            for _ in range(n_mic):
+                await ingest_step()
+            for _ in range(n_tts):
+                await emit_step()
+
+        # warm up (first-call allocations, status broadcast)
+        await ingest_step()
+        await emit_step()
+
+        ingest_meter.enabled = emit_meter.enabled = True
+        tracemalloc.start()
+        await run_all()
+        tracemalloc.stop()
+        ingest_meter.enabled = emit_meter.enabled = False
+
+        t0 = time.perf_counter()
+        await run_all()
+        wall = time.perf_counter() - t0
+
+        results[name] = {
+            "ingest_alloc_kb_per_audio_s": round(ingest_meter.total / 1024 / seconds, 2),
+            "emit_alloc_kb_per_audio_s": round(emit_meter.total / 1024 / seconds, 2),
+            "cpu_us_per_audio_s": round(wall * 1e6 / seconds, 1),
+        }
+    return {"seconds": seconds, "burst": burst, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--burst", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.seconds, max(1, args.burst))), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# benchmarks/bench_pipeline.py
+"""
+Voice hot-path micro-benchmarks, each stage in isolation plus end to end, against a mocked Gemini backend.
+
+    cd voiceproject && python benchmarks/bench_pipeline.py [--iterations 2000] [--only emit_audio,group_send]
+        [--output out.json] [--baseline benchmarks/baseline.json] [--tolerance 0.25] [--save-baseline PATH]
+
+Cases (per-operation latency after a warm-up):
+  consumer_receive_json    TranscriptConsumer.receive: 20 ms JSON/base64 mic frame, decode only
+  consumer_receive_binary  TranscriptConsumer.receive: 20 ms binary mic frame, decode only
+  push_client_audio        AudioLoop.push_client_audio (accounting + enqueue)
+  send_next                AudioLoop._send_next into a session that serializes like the SDK
+  emit_audio               AudioLoop._emit_audio_to_clients: 50 ms TTS chunks up to one coalesced message
+  group_send               InMemoryChannelLayer group_send -> receive on --listeners channels
+  db_save_message          db_helpers.save_message
+  db_get_history           db_helpers.get_history
+  end_to_end               binary mic frame over a WebSocket -> mocked Gemini -> audio message back
+
+Uses a throwaway SQLite database. Prints JSON. With --baseline, each case's p50 is compared to
+the stored one; cases slower by more than --tolerance are listed under "regressions" and the
+exit status is 1. Baselines are machine-specific: record one per machine / CI runner.
+"""
+
+import argparse
+import asyncio
+import base64
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voiceproject.settings")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")  # client is never used
+
+from fake_gemini import FakeConnect, FakeSession  # noqa: E402
+
+MIC_FRAME = 16000 * 2 // 50   # 20 ms of 16 kHz PCM16
+TTS_CHUNK = 24000 * 2 // 20   # 50 ms of 24 kHz PCM16
+CASES = (
+    "consumer_receive_json", "consumer_receive_binary", "push_client_audio", "send_next",
+    "emit_audio", "group_send", "db_save_message", "db_get_history", "end_to_end",
+)
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.VOICE_RECORD_DIR = None
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+# ---------------- mocked backend ----------------
+class NullAudio:
+    async def push_client_audio(self, pcm_bytes, mime_type):
+        pass
+
+
+def bench_loop():
+    from voiceapp.utils import AudioLoop
+
+    loop = AudioLoop(None, None, True, "bench", cache=None, tools=None)
+    loop.session = FakeSession()
+
+    async def sink(event):
+        loop.last_event = event
+
+    loop._broadcast = sink
+    return loop
+
+
+# ---------------- measurement ----------------
+async def measure(op, iterations, warmup, before=None, after=None) -> dict:
+    """Time `await op()` per call; before/after run untimed around each call."""
+    samples = []
+    for i in range(warmup + iterations):
+        if before:
+            await before()
+        t0 = time.perf_counter_ns()
+        await op()
+        dt = time.perf_counter_ns() - t0
+        if after:
+            await after()
+        if i >= warmup:
+            samples.append(dt)
+    return summarize(samples)
+
+
+def summarize(samples) -> dict:
+    samples = sorted(samples)
+    n = len(samples)
+
+    def pct(p):
+        return round(samples[min(n - 1, int(n * p))] / 1000, 2)
+
+    total = sum(samples)
+    return {
+        "n": n,
+        "mean_us": round(total / n / 1000, 2),
+        "p50_us": pct(0.5),
+        "p95_us": pct(0.95),
+        "p99_us": pct(0.99),
+        "ops_per_s": round(n / (total / 1e9), 1) if total else 0.0,
+    }
+
+
+# ---------------- cases ----------------
+async def case_consumer_receive(iterations, warmup, binary):
+    from voiceapp.consumers import TranscriptConsumer
+
+    consumer = TranscriptConsumer()
+    consumer._audio = NullAudio()
+    mic = os.urandom(MIC_FRAME)
+    if binary:
+        return await measure(lambda: consumer.receive(bytes_data=mic), iterations, warmup)
+    text = json.dumps({"type": "audio", "mime": "audio/pcm;rate=16000", "data": base64.b64encode(mic).decode()})
+    return await measure(lambda: consumer.receive(text_data=text), iterations, warmup)
+
+
+async def case_push_client_audio(iterations, warmup):
+    loop = bench_loop()
+    mic = os.urandom(MIC_FRAME)
+    return await measure(lambda: loop.push_client_audio(mic), iterations, warmup, after=loop._send_next)
+
+
+async def case_send_next(iterations, warmup):
+    loop = bench_loop()
+    mic = os.urandom(MIC_FRAME)
+    return await measure(loop._send_next, iterations, warmup, before=lambda: loop.push_client_audio(mic))
+
+
+async def case_emit_audio(iterations, warmup):
+    from voiceapp.utils import EMIT_CHUNK
+
+    loop = bench_loop()
+    tts = os.urandom(TTS_CHUNK)
+    # one op = the chunks that make up one coalesced audio message (otherwise p50 flips between modes)
+    per_message = max(1, EMIT_CHUNK // TTS_CHUNK)
+
+    async def one_message():
+        for _ in range(per_message):
+            await loop._emit_audio_to_clients(tts)
+
+    return await measure(one_message, iterations, warmup)
+
+
+async def case_group_send(iterations, warmup, listeners):
+    from channels.layers import InMemoryChannelLayer
+    from voiceapp.utils import AudioLoop
+
+    layer = InMemoryChannelLayer()
+    channels = [await layer.new_channel() for _ in range(listeners)]
+    for ch in channels:
+        await layer.group_add("voice_bench", ch)
+    b64 = base64.b64encode(os.urandom(TTS_CHUNK * 2)).decode("ascii")
+    event = AudioLoop._event("audio.message", {"type": "audio", "data": b64, "rate": 24000}, bytes=TTS_CHUNK * 2)
+
+    async def round_trip():
+        await layer.group_send("voice_bench", event)
+        for ch in channels:
+            await layer.receive(ch)
+
+    return await measure(round_trip, iterations, warmup)
+
+
+async def case_db_save_message(iterations, warmup):
+    from voiceapp import db_helpers
+
+    conv_id = await db_helpers.get_latest_conversation_id()
+    text = "Which variant has the better mileage, and is the sunroof standard?"
+    return await measure(lambda: db_helpers.save_message(conv_id, "user", text), iterations, warmup)
+
+
+async def case_db_get_history(iterations, warmup):
+    from voiceapp import db_helpers
+
+    conv_id = await db_helpers.get_latest_conversation_id()
+    return await measure(lambda: db_helpers.get_history(conv_id), iterations, warmup)
+
+
+async def case_end_to_end(iterations, warmup):
+    from channels.routing import URLRouter
+    from channels.testing import WebsocketCommunicator
+    from voiceapp import consumers
+    from voiceapp.routing import websocket_urlpatterns
+    from voiceapp.utils import AudioLoop, EMIT_CHUNK
+
+    # each mic frame is answered with exactly one emit's worth of TTS, so every frame yields one audio message
+    original = consumers.AudioLoop
+    consumers.AudioLoop = functools.partial(AudioLoop, connect=FakeConnect(os.urandom(EMIT_CHUNK)), cache=None, tools=None)
+    client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), "/ws/voice/")
+    try:
+        connected, _ = await client.connect()
+        if not connected:
+            raise RuntimeError("websocket connect failed")
+        mic = os.urandom(MIC_FRAME)
+
+        async def round_trip():
+            await client.send_to(bytes_data=mic)
+            while True:
+                msg = await client.receive_from(timeout=5)
+                if msg.startswith('{"type":"audio"'):
+                    return
+
+        return await measure(round_trip, iterations, warmup)
+    finally:
+        await client.disconnect()
+        consumers.AudioLoop = original
+
+
+async def run(args) -> dict:
+    n, w = args.iterations, args.warmup
+    runners = {
+        "consumer_receive_json": lambda: case_consumer_receive(n, w, binary=False),
+        "consumer_receive_binary": lambda: case_consumer_receive(n, w, binary=True),
+        "push_client_audio": lambda: case_push_client_audio(n, w),
+        "send_next": lambda: case_send_next(n, w),
+        "emit_audio": lambda: case_emit_audio(n, w),
+        "group_send": lambda: case_group_send(n, w, args.listeners),
+        # DB and end_to_end are orders of magnitude slower per op
+        "db_save_message": lambda: case_db_save_message(max(1, n // 10), w),
+        "db_get_history": lambda: case_db_get_history(max(1, n // 10), w),
+        "end_to_end": lambda: case_end_to_end(max(1, n // 10), w),
+    }
+    cases = {}
+    for name in args.only or CASES:
+        cases[name] = await runners[name]()
+    return cases
+
+
+# ---------------- baseline comparison ----------------
+def compare(cases: dict, baseline: dict, tolerance: float):
+    comparison, regressions = {}, []
+    base_cases = baseline.get("cases", {})
+    for name, stats in cases.items():
+        base = base_cases.get(name)
+        if not base or not base.get("p50_us"):
+            continue
+        ratio = stats["p50_us"] / base["p50_us"]
+        comparison[name] = {"baseline_p50_us": base["p50_us"], "p50_us": stats["p50_us"], "ratio": round(ratio, 3)}
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--listeners", type=int, default=2, help="Channels in the group for group_send")
+    parser.add_argument("--only", type=lambda s: [c for c in s.split(",") if c], help="Comma-separated case names")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    parser.add_argument("--baseline", help="Compare p50s against this earlier result")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="Write the result here for later --baseline runs")
+    args = parser.parse_args()
+    unknown = set(args.only or ()) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}; choose from {', '.join(CASES)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"))
+        cases = asyncio.run(run(args))
+
+    result = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "iterations": args.iterations,
+            "listeners": args.listeners,
+        },
+        "cases": cases,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            comparison, regressions = compare(cases, json.load(fh), args.tolerance)
+        result["comparison"] = comparison
+        result["regressions"] = regressions
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(text + "\n")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
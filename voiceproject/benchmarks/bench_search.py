@@ -0,0 +1,150 @@
+# benchmarks/bench_search.py
+"""
+Transcript search benchmark: FTS index vs LIKE scan over a synthetic Message table.
+
+    cd voiceproject && python benchmarks/bench_search.py [--messages 1000000] [--queries 50]
+
+Runs against a throwaway sqlite file (never the project database) and prints JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voiceproject.settings")
+
+WORDS = (
+    "mahindra xuv700 scorpio thar suv sedan mileage safety airbags sunroof diesel petrol "
+    "automatic manual seats family city highway offroad budget price emi loan brochure "
+    "dealership showroom test drive booking delivery colour variant engine torque boot "
+    "space comfort warranty service insurance exchange finance features touchscreen "
+    "camera sensors cruise control music speakers legroom ground clearance weekend trip"
+).split()
+FILLER = "i we you the a is it for to and with my our what how can would like looking need".split()
+SYLLABLES = "ka ri to na mi su ve lo de pa ra ni zo bu he ga ju".split()
+
+
+def build_vocab(rnd, size=20000):
+    """Domain words first, then synthetic words; sampled Zipf-style so most terms are rare."""
+    vocab = list(WORDS)
+    seen = set(vocab)
+    while len(vocab) < size:
+        w = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+        if w not in seen:
+            seen.add(w)
+            vocab.append(w)
+    cum, total = [], 0.0
+    for rank in range(1, len(vocab) + 1):
+        total += 1.0 / rank
+        cum.append(total)
+    return vocab, cum
+
+
+def sentence(rnd, vocab, cum):
+    n = rnd.randint(6, 24)
+    words = rnd.choices(vocab, cum_weights=cum, k=n)
+    return " ".join(w if rnd.random() < 0.5 else rnd.choice(FILLER) for w in words)
+
+
+def setup_db(path):
+    from django.conf import settings
+    settings.DATABASES["default"]["NAME"] = path
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def populate(n_messages, vocab, cum, per_conversation=40, seed=7):
+    from django.db import connection, transaction
+    rnd = random.Random(seed)
+    start = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cur:
+        n_conv = max(1, n_messages // per_conversation)
+        conv_ids = [uuid.uuid4().hex for _ in range(n_conv)]
+        cur.executemany(
+            "INSERT INTO voiceapp_conversation (id, created_at) VALUES (%s, %s)",
+            [(cid, "2025-01-01 00:00:00") for cid in conv_ids],
+        )
+        batch = []
+        for i in range(n_messages):
+            batch.append((
+                conv_ids[i // per_conversation % n_conv],
+                "user" if i % 2 == 0 else "assistant",
+                sentence(rnd, vocab, cum),
+                f"2025-01-01 00:{(i // 60) % 60:02d}:{i % 60:02d}",
+            ))
+            if len(batch) >= 10000:
+                cur.executemany(
+                    "INSERT INTO voiceapp_message (conversation_id, role, content, timestamp) VALUES (%s, %s, %s, %s)",
+                    batch,
+                )
+                batch.clear()
+        if batch:
+            cur.executemany(
+                "INSERT INTO voiceapp_message (conversation_id, role, content, timestamp) VALUES (%s, %s, %s, %s)",
+                batch,
+            )
+    return time.perf_counter() - start
+
+
+def timed(fn, queries):
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_db(os.path.join(tmp, "bench.sqlite3"))
+        from voiceapp import search
+
+        vocab, cum = build_vocab(random.Random(3))
+        insert_s = populate(args.messages, vocab, cum)
+        rnd = random.Random(11)
+        common = [rnd.choice(vocab[:50]) for _ in range(args.queries)]
+        rare = [" ".join(rnd.sample(vocab[500:], rnd.choice((1, 2)))) for _ in range(args.queries)]
+
+        def fts(q):
+            return search._search_messages_sync(q, limit=args.limit)
+
+        def like(q):
+            return search._ranked_ids_like(q, args.limit, None)
+
+        result = {
+            "messages": args.messages,
+            "queries": args.queries,
+            "insert_s_with_index_triggers": round(insert_s, 2),
+            "common_terms": {"fts": timed(fts, common), "like_scan": timed(like, common)},
+            "rare_terms": {"fts": timed(fts, rare), "like_scan": timed(like, rare)},
+        }
+        from django.db import connection
+        connection.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
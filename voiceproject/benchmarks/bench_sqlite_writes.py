@@ -0,0 +1,151 @@
+# benchmarks/bench_sqlite_writes.py
+"""
+SQLite write-throughput benchmark: default profile vs VOICE_SQLITE_TUNED (WAL + writer thread).
+
+    cd voiceproject && python benchmarks/bench_sqlite_writes.py [--sessions 16] [--messages 200] [--processes 2]
+
+Each mode gets a fresh throwaway database. `--processes` worker processes share it
+(like several ASGI workers) and each runs sessions/processes concurrent sessions that
+save transcript rows while also reading history, as a connect would. Prints JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+sys.path.insert(0, str(HERE.parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voiceproject.settings")
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES["default"]["NAME"] = db_path
+
+    import django
+    django.setup()
+
+
+def child_migrate(db_path):
+    setup_django(db_path)
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+async def session(conv_id, n_messages, write_lat, read_lat, errors):
+    from voiceapp import db_helpers
+
+    for i in range(n_messages):
+        t0 = time.perf_counter()
+        try:
+            await db_helpers.save_message(conv_id, "user" if i % 2 else "assistant", f"turn {i} about mileage and seats")
+            write_lat.append(time.perf_counter() - t0)
+        except Exception as e:
+            errors.append(type(e).__name__ + ": " + str(e)[:60])
+        if i % 10 == 0:
+            t0 = time.perf_counter()
+            try:
+                await db_helpers.get_history(conv_id)
+                read_lat.append(time.perf_counter() - t0)
+            except Exception as e:
+                errors.append(type(e).__name__ + ": " + str(e)[:60])
+
+
+def child_run(db_path, sessions, n_messages):
+    setup_django(db_path)
+    from voiceapp.models import Conversation
+
+    conv_ids = [str(Conversation.objects.create().id) for _ in range(sessions)]
+    write_lat, read_lat, errors = [], [], []
+
+    async def main():
+        await asyncio.gather(*(session(c, n_messages, write_lat, read_lat, errors) for c in conv_ids))
+
+    t0 = time.perf_counter()
+    asyncio.run(main())
+    wall = time.perf_counter() - t0
+    print(json.dumps({
+        "wall_s": wall,
+        "writes": len(write_lat),
+        "write_lat": write_lat,
+        "read_lat": read_lat,
+        "errors": errors,
+    }))
+
+
+def pct(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3)
+
+
+def run_mode(tuned, args):
+    env = dict(os.environ, VOICE_SQLITE_TUNED="1" if tuned else "0", GEMINI_API_KEY="benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite3")
+        subprocess.run([sys.executable, str(HERE), "--child", "migrate", "--db", db_path], env=env, check=True)
+        per_proc = max(1, args.sessions // args.processes)
+        procs = [
+            subprocess.Popen(
+                [sys.executable, str(HERE), "--child", "run", "--db", db_path,
+                 "--sessions", str(per_proc), "--messages", str(args.messages)],
+                env=env, stdout=subprocess.PIPE,
+            )
+            for _ in range(args.processes)
+        ]
+        outs = [json.loads(p.communicate()[0]) for p in procs]
+
+    wall = max(o["wall_s"] for o in outs)
+    writes = sum(o["writes"] for o in outs)
+    write_lat = [x for o in outs for x in o["write_lat"]]
+    read_lat = [x for o in outs for x in o["read_lat"]]
+    errors = [e for o in outs for e in o["errors"]]
+    return {
+        "writes": writes,
+        "writes_per_s": round(writes / wall, 1) if wall else 0.0,
+        "write_p50_ms": pct(write_lat, 0.5),
+        "write_p95_ms": pct(write_lat, 0.95),
+        "read_p50_ms": pct(read_lat, 0.5),
+        "read_p95_ms": pct(read_lat, 0.95),
+        "read_mean_ms": round(statistics.mean(read_lat) * 1000, 3) if read_lat else 0.0,
+        "errors": len(errors),
+        "error_kinds": sorted(set(errors))[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16, help="Total concurrent sessions")
+    parser.add_argument("--messages", type=int, default=200, help="Messages saved per session")
+    parser.add_argument("--processes", type=int, default=2, help="Worker processes sharing the DB")
+    parser.add_argument("--child", choices=["migrate", "run"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "migrate":
+        child_migrate(args.db)
+        return
+    if args.child == "run":
+        child_run(args.db, args.sessions, args.messages)
+        return
+
+    result = {
+        "sessions": args.sessions,
+        "messages_per_session": args.messages,
+        "processes": args.processes,
+        "default": run_mode(False, args),
+        "tuned": run_mode(True, args),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
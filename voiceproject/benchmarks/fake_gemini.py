@@ -0,0 +1,84 @@
+# benchmarks/fake_gemini.py
+"""
+Mocked Gemini live backend shared by the benchmarks.
+
+FakeSession serializes each client message the way the SDK does before it hits
+the socket (Blob validation + base64 + JSON). That step is google-genai's private
+AsyncSession._parse_client_message, so it is looked up once and fails with an
+explicit message if the installed SDK no longer has it.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+TESTED_GENAI_VERSION = "2.31.0"
+
+
+def _genai_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("google-genai")
+    except Exception:
+        return "unknown"
+
+
+def client_message_parser():
+    """google-genai's client-message serializer, bound to a minimal (non-Vertex) client stub."""
+    try:
+        from google.genai.live import AsyncSession
+        parse = AsyncSession._parse_client_message
+    except (ImportError, AttributeError) as e:
+        raise RuntimeError(
+            "benchmarks serialize like the SDK via google.genai.live.AsyncSession._parse_client_message, "
+            f"a private API (checked against google-genai {TESTED_GENAI_VERSION}, installed: {_genai_version()}). "
+            "Install a matching google-genai or update benchmarks/fake_gemini.py."
+        ) from e
+    stub = SimpleNamespace(_api_client=SimpleNamespace(vertexai=False))
+    return lambda message: parse(stub, message)
+
+
+class FakeSession:
+    """Serializes like the real live session, minus the socket; optionally answers mic audio with TTS."""
+
+    _parse = None
+
+    def __init__(self, reply=None):
+        if FakeSession._parse is None:
+            FakeSession._parse = staticmethod(client_message_parser())
+        self.reply = reply            # bytes of TTS audio answered per mic chunk (end_to_end)
+        self.responses = asyncio.Queue()
+        self.last = None
+
+    async def send(self, input=None, **kwargs):
+        self.last = json.dumps(self._parse(input))
+        if self.reply and isinstance(input, dict) and "data" in input:
+            part = SimpleNamespace(inline_data=SimpleNamespace(data=self.reply, mime_type="audio/pcm;rate=24000"))
+            self.responses.put_nowait(SimpleNamespace(
+                tool_call=None, tool_call_cancellation=None,
+                server_content=SimpleNamespace(
+                    input_transcription=None, output_transcription=None,
+                    model_turn=SimpleNamespace(parts=[part]),
+                ),
+            ))
+
+    async def receive(self):
+        # one open-ended turn, like a long reply streaming back
+        while True:
+            yield await self.responses.get()
+
+
+class FakeConnect:
+    """Stand-in for client.aio.live.connect: an async context manager yielding a FakeSession."""
+
+    def __init__(self, reply=None):
+        self.reply = reply
+
+    def __call__(self, model, config):
+        return self
+
+    async def __aenter__(self):
+        return FakeSession(self.reply)
+
+    async def __aexit__(self, *exc):
+        return False
@@ -3,7 +3,13 @@
   // Config
   const CAPTURE_RATE = 16000, PLAYBACK_RATE = 24000, PROC_CHUNK = 2048, SEND_HZ = 50,
     SEND_PERIOD = 1000 / SEND_HZ, MAX_BATCH = Math.floor(CAPTURE_RATE / SEND_HZ) * 2,
-    RECONNECT_MAX_DELAY = 8000;
+    FRAME_SAMPLES = Math.floor(CAPTURE_RATE / SEND_HZ), JITTER_MS = 80, SCHEDULE_LEAD = 0.02,
+    RECONNECT_MAX_DELAY = 8000,
+    SESSION_ENDED_CODE = 4408; // server reaped the session (idle / quota): don't auto-reconnect
+  // Capture worklet module; the template passes its {% static %} URL
+  const scriptEl = document.currentScript,
+    WORKLET_URL = (scriptEl && scriptEl.dataset.worklet) ||
+      new URL('pcm-capture-worklet.js', scriptEl ? scriptEl.src : location.href).href;
   // DOM elements
   const statusDiv = document.getElementById('status'),
     enableBtn = document.getElementById('enableMic'),
@@ -61,7 +67,7 @@
   requestAnimationFrame(rafFlush);
 
   // WebSocket connection
-  let ws, reconnectDelay = 500, reconnectTimer = null;
+  let ws, reconnectDelay = 500, reconnectTimer = null, sessionEnded = false, micOnOpen = false;
   function connectWS() {
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
     ws = new WebSocket(`${proto}://${location.host}/ws/voice/`);
@@ -70,8 +76,19 @@
       enableBtn.disabled = false;
       if (reconnectTimer) { clearTimeout(reconnectTimer); reconnectTimer = null; }
       reconnectDelay = 500;
+      if (micOnOpen) { micOnOpen = false; startMic(); }
     };
-    ws.onclose = () => {
+    ws.onclose = (e) => {
+      if (e.code === SESSION_ENDED_CODE) {
+        // a new connection would open a new backend session; wait for the user instead
+        sessionEnded = true;
+        stopMic();
+        if (reconnectTimer) { clearTimeout(reconnectTimer); reconnectTimer = null; }
+        statusDiv.textContent = 'Status: Session ended — click to start a new one';
+        whoDiv.textContent = 'Session ended.';
+        enableBtn.disabled = false;
+        return;
+      }
       statusDiv.textContent = 'Status: Disconnected — retrying…';
       stopMic();
       if (reconnectTimer) clearTimeout(reconnectTimer);
@@ -98,7 +115,7 @@
         }
         return;
       }
-      if (data.type === 'audio' && data.data) { playPcmBase64(data.data, PLAYBACK_RATE); return; }
+      if (data.type === 'audio' && data.data) { playPcmBase64(data.data, data.rate || PLAYBACK_RATE); return; }
       if (data.role && typeof data.text === 'string') { upsertTranscript(data.role, data.text); return; }
     };
   }
@@ -106,7 +123,10 @@
   enableBtn.disabled = true;
 
   // Audio Capture
-  let mediaStream, audioCtx, processor, source, micEnabled = false, startingMic = false, batch = new Uint8Array(0), sendTimer = null;
+  // Preferred: AudioWorklet (pcm-capture-worklet.js) converts to PCM16 off the main thread and posts
+  // 20 ms frames that go straight out as binary WebSocket messages.
+  // Fallback for browsers without AudioWorklet: ScriptProcessor + base64 JSON (still accepted by the server).
+  let mediaStream, audioCtx, processor, workletNode, source, micEnabled = false, startingMic = false, batch = new Uint8Array(0), sendTimer = null;
   class PCM16Encoder {
     encode(float32) {
       let len = float32.length, out = new Int16Array(len);
@@ -142,6 +162,32 @@
     }, SEND_PERIOD);
   }
   function stopSendLoop() { if (sendTimer) { clearInterval(sendTimer); sendTimer = null; } }
+  async function loadCaptureWorklet(ctx) {
+    try { await ctx.audioWorklet.addModule(WORKLET_URL); return true; }
+    catch (e) { console.warn('[voice] capture worklet unavailable, using ScriptProcessor', e); return false; }
+  }
+  function startWorkletCapture(loaded) {
+    if (!loaded) { startLegacyCapture(); return; }
+    workletNode = new AudioWorkletNode(audioCtx, 'pcm-capture', {
+      numberOfInputs: 1, numberOfOutputs: 1, channelCount: 1,
+      processorOptions: { targetRate: CAPTURE_RATE, frameSamples: FRAME_SAMPLES },
+    });
+    // each message is one PCM16 frame (ArrayBuffer); ws.send() of a buffer is a binary frame
+    workletNode.port.onmessage = (e) => { if (ws && ws.readyState === 1) ws.send(e.data); };
+    source.connect(workletNode);
+    // outputs stay silent; connecting keeps the node pulled by the graph in every browser
+    workletNode.connect(audioCtx.destination);
+  }
+  function startLegacyCapture() {
+    processor = audioCtx.createScriptProcessor(PROC_CHUNK, 1, 1);
+    const encoder = new PCM16Encoder();
+    processor.onaudioprocess = (ev) => {
+      batch = concatU8(batch, encoder.encode(ev.inputBuffer.getChannelData(0)));
+    };
+    source.connect(processor);
+    processor.connect(audioCtx.destination);
+    startSendLoop();
+  }
   async function startMic() {
     if (startingMic || micEnabled) return;
     startingMic = true; enableBtn.disabled = true;
@@ -150,18 +196,12 @@
       audioCtx = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: CAPTURE_RATE });
       if (audioCtx.state !== 'running') await audioCtx.resume();
       source = audioCtx.createMediaStreamSource(mediaStream);
-      processor = audioCtx.createScriptProcessor(PROC_CHUNK, 1, 1);
-      const encoder = new PCM16Encoder();
-      processor.onaudioprocess = (ev) => {
-        batch = concatU8(batch, encoder.encode(ev.inputBuffer.getChannelData(0)));
-      };
-      source.connect(processor);
-      processor.connect(audioCtx.destination);
+      if (audioCtx.audioWorklet) startWorkletCapture(await loadCaptureWorklet(audioCtx));
+      else startLegacyCapture();
       micEnabled = true; enableBtn.classList.remove('off'); led.classList.add('on');
       enableBtn.textContent = 'Disable Microphone ';
       if (led.parentNode !== enableBtn) enableBtn.appendChild(led);
       statusDiv.textContent = 'Microphone enabled';
-      startSendLoop();
     } catch (e) {
       statusDiv.textContent = 'Mic error: ' + (e && e.message ? e.message : e);
     } finally {
@@ -170,6 +210,7 @@
   }
   function stopMic() {
     try {
+      if (workletNode) { workletNode.port.postMessage('stop'); workletNode.port.onmessage = null; workletNode.disconnect(); workletNode = null; }
       if (processor) { processor.disconnect(); processor.onaudioprocess = null; processor = null; }
       if (source) { source.disconnect(); source = null; }
       if (audioCtx) { audioCtx.close(); audioCtx = null; }
@@ -183,6 +224,12 @@
     stopSendLoop();
   }
   enableBtn.addEventListener('click', () => {
+    if (sessionEnded) {
+      sessionEnded = false; micOnOpen = true; enableBtn.disabled = true;
+      statusDiv.textContent = 'Status: Connecting…';
+      connectWS();
+      return;
+    }
     if (!ws || ws.readyState !== 1) {
       statusDiv.textContent = 'Status: Connecting… please wait';
       return;
@@ -191,31 +238,62 @@
   });
 
   // Playback
-  let playbackCtx, playTime = 0;
+  // Chunks are scheduled back-to-back on the AudioContext clock (playTime), so there are no gaps
+  // between them. When nothing is queued ahead (turn start or underrun), up to JITTER_MS of audio
+  // is collected first, so network jitter doesn't cause a stutter right after.
+  let playbackCtx, playTime = 0, pending = [], pendingDur = 0, primeTimer = null;
   function ensurePlaybackCtx(rate) {
     if (!playbackCtx || playbackCtx.sampleRate !== rate) {
+      if (playbackCtx) { try { playbackCtx.close(); } catch (_) {} }
       playbackCtx = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: rate });
       playTime = playbackCtx.currentTime;
+      pending = []; pendingDur = 0;
     }
     return playbackCtx;
   }
-  function playPcmBase64(b64, sampleRate) {
-    if (!b64) return;
-    let bytes; try { bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0)); } catch { return; }
-    if (!bytes.length) return;
-    const view = new DataView(bytes.buffer), len = bytes.byteLength / 2,
-      ctx = ensurePlaybackCtx(sampleRate), buffer = ctx.createBuffer(1, len, sampleRate), ch = buffer.getChannelData(0);
-    for (let i = 0; i < len; i++) ch[i] = view.getInt16(i * 2, true) / 0x8000;
+  function decodePcm16(b64) {
+    // little-endian PCM16 -> Float32 straight from the base64 string (no intermediate Uint8Array)
+    let bin; try { bin = atob(b64); } catch { return null; }
+    const n = bin.length >> 1, out = new Float32Array(n);
+    for (let i = 0, j = 0; i < n; i++, j += 2) {
+      const v = bin.charCodeAt(j) | (bin.charCodeAt(j + 1) << 8);
+      out[i] = (v & 0x8000 ? v - 0x10000 : v) / 0x8000;
+    }
+    return out;
+  }
+  function scheduleChunk(ctx, samples, at) {
+    const buffer = ctx.createBuffer(1, samples.length, ctx.sampleRate);
+    if (buffer.copyToChannel) buffer.copyToChannel(samples, 0); else buffer.getChannelData(0).set(samples);
     const src = ctx.createBufferSource(); src.buffer = buffer; src.connect(ctx.destination);
-    const now = ctx.currentTime; if (playTime < now) playTime = now;
     // Visualizer logic: Track when audio is playing
     assistantAudioPending = (assistantAudioPending || 0) + 1;
     src.onended = function () {
       assistantAudioPending = Math.max(0, assistantAudioPending - 1);
       if (needsHideBar && assistantAudioPending === 0 && barViz) barViz.style.display = 'none';
     };
-    try { src.start(playTime); } catch {}
-    playTime += buffer.duration;
+    try { src.start(at); } catch {}
+    return at + buffer.duration;
+  }
+  function flushPending() {
+    if (primeTimer) { clearTimeout(primeTimer); primeTimer = null; }
+    if (!pending.length || !playbackCtx) return;
+    let at = Math.max(playTime, playbackCtx.currentTime + SCHEDULE_LEAD);
+    for (const samples of pending) at = scheduleChunk(playbackCtx, samples, at);
+    playTime = at; pending = []; pendingDur = 0;
+  }
+  function playPcmBase64(b64, sampleRate) {
+    if (!b64) return;
+    const samples = decodePcm16(b64);
+    if (!samples || !samples.length) return;
+    const ctx = ensurePlaybackCtx(sampleRate);
+    if (!pending.length && playTime > ctx.currentTime + SCHEDULE_LEAD) {
+      // audio still queued ahead of the clock: append seamlessly
+      playTime = scheduleChunk(ctx, samples, playTime);
+      return;
+    }
+    pending.push(samples); pendingDur += samples.length / sampleRate;
+    if (pendingDur * 1000 >= JITTER_MS) flushPending();
+    else if (!primeTimer) primeTimer = setTimeout(flushPending, JITTER_MS);
   }
 
   // Lifecycle management
@@ -0,0 +1,51 @@
+// AudioWorklet: mic Float32 -> PCM16 mono at targetRate, posted as fixed-size binary frames.
+// Runs on the audio rendering thread; the page only forwards each ArrayBuffer to the WebSocket.
+class PcmCaptureProcessor extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    const opts = (options && options.processorOptions) || {};
+    this.targetRate = opts.targetRate || 16000;
+    this.frameSamples = opts.frameSamples || Math.floor(this.targetRate / 50);
+    // sampleRate is the context rate (AudioWorkletGlobalScope); step < 1 never happens for mic capture
+    this.step = sampleRate / this.targetRate;
+    this.pos = 0;        // fractional read position into the current input block (resampling)
+    this.last = 0;       // previous block's last sample, for interpolation across blocks
+    this.frame = new Int16Array(this.frameSamples);
+    this.fill = 0;
+    this.active = true;
+    this.port.onmessage = (e) => { if (e.data === 'stop') this.active = false; };
+  }
+
+  push(s) {
+    s = s < -1 ? -1 : (s > 1 ? 1 : s);
+    this.frame[this.fill++] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+    if (this.fill === this.frameSamples) {
+      // transfer ownership instead of copying; start a fresh frame
+      this.port.postMessage(this.frame.buffer, [this.frame.buffer]);
+      this.frame = new Int16Array(this.frameSamples);
+      this.fill = 0;
+    }
+  }
+
+  process(inputs) {
+    const ch = inputs[0] && inputs[0][0];
+    if (!ch) return this.active;
+    if (this.step === 1) {
+      for (let i = 0; i < ch.length; i++) this.push(ch[i]);
+      return this.active;
+    }
+    // linear-interpolation resample; index -1 refers to the previous block's last sample
+    let pos = this.pos;
+    while (pos < ch.length) {
+      const i = Math.floor(pos), frac = pos - i;
+      const a = i === 0 ? this.last : ch[i - 1], b = ch[i];
+      this.push(a + (b - a) * frac);
+      pos += this.step;
+    }
+    this.pos = pos - ch.length;
+    this.last = ch[ch.length - 1];
+    return this.active;
+  }
+}
+
+registerProcessor('pcm-capture', PcmCaptureProcessor);
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class VoiceappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'voiceapp'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        if getattr(settings, "VOICE_SQLITE_TUNED", False):
+            from .sqlite_profile import apply_sqlite_pragmas
+            connection_created.connect(apply_sqlite_pragmas, dispatch_uid="voiceapp_sqlite_pragmas")
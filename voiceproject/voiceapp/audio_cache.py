@@ -0,0 +1,109 @@
+# voiceapp/audio_cache.py
+"""
+Content-addressed cache for fixed model responses (e.g. the session greeting).
+
+Entries are keyed by hash(prompt) + voice + request text and hold the raw
+24 kHz PCM plus its transcript. Two tiers: an in-memory LRU bounded by bytes,
+and an optional on-disk directory (<key>.pcm + <key>.json) that survives restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    audio: bytes
+    text: str
+    mime: str
+
+
+def response_key(prompt: str, voice: str, text: str, model: str = "") -> str:
+    prompt_hash = hashlib.sha256((prompt or "").strip().encode("utf-8")).hexdigest()
+    raw = "\x1f".join([prompt_hash, voice or "", (text or "").strip(), model or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseAudioCache:
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, disk_dir: Optional[str | Path] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._mem: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._mem_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- memory tier (LRU) ----------------
+    def _remember(self, key: str, entry: CachedResponse):
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old.audio)
+        if len(entry.audio) > self.max_bytes:
+            return
+        self._mem[key] = entry
+        self._mem_bytes += len(entry.audio)
+        while self._mem_bytes > self.max_bytes and self._mem:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted.audio)
+
+    # ---------------- disk tier ----------------
+    def _disk_paths(self, key: str):
+        return self.disk_dir / f"{key}.pcm", self.disk_dir / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        if not self.disk_dir:
+            return None
+        pcm_path, meta_path = self._disk_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            audio = pcm_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(audio=audio, text=meta.get("text", ""), mime=meta.get("mime", ""))
+
+    def _store(self, key: str, entry: CachedResponse):
+        if not self.disk_dir:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            pcm_path, meta_path = self._disk_paths(key)
+            # write-then-rename so readers never see a partial entry
+            tmp = pcm_path.with_suffix(".pcm.tmp")
+            tmp.write_bytes(entry.audio)
+            os.replace(tmp, pcm_path)
+            tmp = meta_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps({"text": entry.text, "mime": entry.mime}), encoding="utf-8")
+            os.replace(tmp, meta_path)
+        except OSError:
+            pass
+
+    # ---------------- public API ----------------
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return entry
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, audio: bytes, text: str, mime: str):
+        if not audio or not (text or "").strip():
+            return
+        entry = CachedResponse(audio=bytes(audio), text=text.strip(), mime=mime)
+        self._remember(key, entry)
+        self._store(key, entry)
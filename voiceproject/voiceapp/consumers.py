@@ -3,15 +3,55 @@ import json
 import uuid
 import asyncio
 import base64
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from .utils import AudioLoop
+from .recording import recorder_from_settings
+from .sessions import LIVE_SESSIONS, observer_allowed, session_started, session_ended
 
 PCM_SEND_RATE = 16000   # browser -> server (mic)
-PCM_RECV_RATE = 24000   # server -> browser (TTS)
 
-class TranscriptConsumer(AsyncWebsocketConsumer):
+
+class VoiceGroupConsumer(AsyncWebsocketConsumer):
+    """
+    Relays AudioLoop group events. Payloads arrive pre-encoded in event["json"],
+    so each listener forwards the same string instead of re-serializing it.
+    """
+
+    async def transcript_message(self, event):
+        await self._send_text(event.get("json"))
+
+    # function determined to display the state where the user speaks
+    async def status_message(self, event):
+        await self._send_text(event.get("json"))
+
+    # Send Gemini's audio to browser
+    async def audio_message(self, event):
+        await self._send_text(event.get("json"))
+
+    async def _send_text(self, text):
+        if not text:
+            return
+        try:
+            await self.send(text_data=text)
+        except Exception:
+            pass
+
+    # Small helper to keep sends consistent/compact
+    async def _send_json(self, payload: dict):
+        await self._send_text(json.dumps(payload, separators=(",", ":")))
+
+
+class TranscriptConsumer(VoiceGroupConsumer):
+    """
+    Mic input, either form:
+      binary frame -> raw PCM16 LE mono @ 16kHz (AudioWorklet client)
+      text frame   -> {"type": "audio", "mime": "audio/pcm;rate=16000", "data": <base64>} (legacy client)
+    """
+
     async def connect(self):
-        self.group_name = f"voice_{uuid.uuid4().hex}"
+        self.session_id = uuid.uuid4().hex
+        self.group_name = f"voice_{self.session_id}"
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
@@ -24,9 +64,12 @@ class TranscriptConsumer(AsyncWebsocketConsumer):
                 pya_instance=None,
                 stdout=None,
                 browser_mode=True,
-                group_name=self.group_name
+                group_name=self.group_name,
+                recorder=recorder_from_settings(self.group_name),
             )
             self._loop_task = asyncio.create_task(self._audio.run())
+            # register with the quota reaper (sessions.py) and the observer listing
+            session_started(self.session_id, audio=self._audio, close=self.close)
         except Exception:
             # Close gracefully if loop can't start
             try:
@@ -35,6 +78,7 @@ class TranscriptConsumer(AsyncWebsocketConsumer):
                 pass
 
     async def disconnect(self, code):
+        session_ended(getattr(self, "session_id", None))
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
         # Stop AudioLoop first so it stops emitting to the group
         try:
@@ -58,6 +102,11 @@ class TranscriptConsumer(AsyncWebsocketConsumer):
 
         # Fast path: raw binary PCM16 mono @ 16kHz
         if bytes_data:
+            # a stray odd byte would misalign every later sample; drop it
+            if len(bytes_data) & 1:
+                bytes_data = bytes_data[:-1]
+                if not bytes_data:
+                    return
             await self._audio.push_client_audio(bytes_data, f"audio/pcm;rate={PCM_SEND_RATE}")
             return
 
@@ -89,34 +138,39 @@ class TranscriptConsumer(AsyncWebsocketConsumer):
             except Exception:
                 pass
 
-    # Handle transcript events from AudioLoop
-    async def transcript_message(self, event):
-        # event = {"type": "transcript.message", "role": "user"|"assistant", "text": "..."}
-        await self._send_json({
-            "role": event.get("role"),
-            "text": event.get("text"),
-        })
 
-    # function determined to display the state where the user speaks
-    async def status_message(self, event):
-        await self._send_json({
-            "type": "status",
-            "role": event.get("role"),
-            "speaking": bool(event.get("speaking")),
-        })
+class ObserverConsumer(VoiceGroupConsumer):
+    """
+    Read-only listener on a running session: ws/voice/observe/<session_id>/[?audio=1]
+    """
 
-    # Send Gemini's audio to browser
-    async def audio_message(self, event):
-        await self._send_json({
-            "type": "audio",
-            "mime": event.get("mime") or f"audio/pcm;rate={PCM_RECV_RATE}",
-            "data": event.get("data"),
-            "rate": PCM_RECV_RATE,
-        })
+    async def connect(self):
+        self.group_name = None
+        session_id = self.scope["url_route"]["kwargs"].get("session_id")
+        if session_id not in LIVE_SESSIONS or not observer_allowed(self.scope.get("user")):
+            await self.close(code=4403)
+            return
+        query = parse_qs((self.scope.get("query_string") or b"").decode("ascii", "ignore"))
+        self.with_audio = (query.get("audio") or ["0"])[0] in ("1", "true", "yes")
+        self.group_name = f"voice_{session_id}"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
 
-    # Small helper to keep sends consistent/compact
-    async def _send_json(self, payload: dict):
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # read-only: only answer keepalives
+        if not text_data:
+            return
         try:
-            await self.send(text_data=json.dumps(payload, separators=(",", ":")))
+            data = json.loads(text_data)
         except Exception:
-            pass
\ No newline at end of file
+            return
+        if isinstance(data, dict) and data.get("type") == "ping":
+            await self._send_json({"type": "pong"})
+
+    async def audio_message(self, event):
+        if self.with_audio:
+            await self._send_text(event.get("json"))
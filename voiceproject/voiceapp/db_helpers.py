@@ -4,9 +4,13 @@ from __future__ import annotations
 
 from typing import List, Tuple, Optional
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db.models import QuerySet
 
+from .db_writer import writer_async
 from .models import Conversation, Message
+NO_HISTORY = "No prior conversation."
+
 # ----------------------------
 # Low-level SYNC implementations
 # ----------------------------
@@ -38,7 +42,7 @@ def _get_history_sync(conversation_id: str | int, limit: int = 6) -> str:
     )
     items = list(reversed(qs))
     if not items:
-        return "No prior conversation."
+        return NO_HISTORY
     lines = [
         f"{'User' if m.role == 'user' else 'Assistant'}: {m.content}"
         for m in items
@@ -71,9 +75,13 @@ def _db_health_check_sync() -> bool:
     _ = Conversation.objects.order_by("id").first()
     return True
 
-save_message = sync_to_async(_save_message_sync)
+# Writes go to the dedicated writer thread when VOICE_DB_WRITER is on (SQLite tuned profile)
+_write_async = writer_async if getattr(settings, "VOICE_DB_WRITER", False) else sync_to_async
+
+save_message = _write_async(_save_message_sync)
 get_history = sync_to_async(_get_history_sync)
-get_latest_conversation_id = sync_to_async(_get_latest_conversation_id_sync)
+# may create the first Conversation, so it is routed like a write
+get_latest_conversation_id = _write_async(_get_latest_conversation_id_sync)
 list_recent_conversations = sync_to_async(_list_recent_conversations_sync)
 db_health_check = sync_to_async(_db_health_check_sync)
 
@@ -0,0 +1,95 @@
+# voiceapp/db_writer.py
+"""
+Single dedicated DB writer thread.
+
+Writes are queued from the event loop and executed by one thread that owns a
+persistent connection; whatever is queued at once is committed together in one
+transaction (each write in its own savepoint, so one failure doesn't sink the batch).
+Reads keep using sync_to_async and, with SQLite in WAL mode, never wait on writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import queue
+import threading
+from typing import Callable
+
+from django.db import close_old_connections, transaction
+
+MAX_BATCH = 64
+
+
+class DbWriter:
+
+    def __init__(self, name: str = "voice-db-writer", max_batch: int = MAX_BATCH):
+        self.name = name
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            results = []
+            try:
+                # drop connections past CONN_MAX_AGE / unusable ones, like a request boundary would
+                close_old_connections()
+                with transaction.atomic():
+                    for func, args, kwargs, _, _ in batch:
+                        try:
+                            with transaction.atomic():
+                                results.append((True, func(*args, **kwargs)))
+                        except Exception as e:
+                            results.append((False, e))
+            except Exception as e:
+                # commit itself failed: every write in the batch failed
+                results = [(False, e)] * len(batch)
+            for (_, _, _, loop, fut), (ok, value) in zip(batch, results):
+                try:
+                    loop.call_soon_threadsafe(_settle, fut, ok, value)
+                except RuntimeError:
+                    pass  # caller's loop already closed
+
+    async def submit(self, func: Callable, *args, **kwargs):
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._queue.put((func, args, kwargs, loop, fut))
+        return await fut
+
+
+def _settle(fut: asyncio.Future, ok: bool, value):
+    if fut.done():
+        return
+    if ok:
+        fut.set_result(value)
+    else:
+        fut.set_exception(value)
+
+
+db_writer = DbWriter()
+
+
+def writer_async(func: Callable):
+    """Like sync_to_async, but runs `func` on the shared writer thread."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await db_writer.submit(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,33 @@
+# voiceapp/management/commands/compact_transcripts.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from voiceapp.retention import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE_S, run_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Coalesce duplicate transcript rows, archive idle conversations to gzip JSONL "
+        "and prune them from the database in small batches. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Archive conversations idle this many days (default: VOICE_RETENTION_DAYS)")
+        parser.add_argument("--archive-dir", default=None, help="Default: VOICE_ARCHIVE_DIR")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per DELETE")
+        parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE_S, help="Seconds to sleep between batches")
+        parser.add_argument("--no-coalesce", action="store_true", help="Skip duplicate coalescing")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+
+    def handle(self, *args, **options):
+        stats = run_retention(
+            days=options["days"],
+            archive_dir=options["archive_dir"],
+            batch_size=max(1, options["batch_size"]),
+            pause_s=max(0.0, options["pause"]),
+            coalesce=not options["no_coalesce"],
+            dry_run=options["dry_run"],
+        )
+        self.stdout.write(json.dumps(stats, indent=2))
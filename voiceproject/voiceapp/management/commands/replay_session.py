@@ -0,0 +1,22 @@
+# voiceapp/management/commands/replay_session.py
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from voiceapp.recording import replay
+
+
+class Command(BaseCommand):
+    help = "Replay a recorded voice session through AudioLoop and print hot-path timings as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Recording directory (contains events.jsonl + audio.pcm)")
+        parser.add_argument(
+            "--speed", type=float, default=1.0,
+            help="1 = real time, >1 accelerated, 0 = as fast as possible",
+        )
+
+    def handle(self, *args, **options):
+        stats = asyncio.run(replay(options["path"], speed=options["speed"]))
+        self.stdout.write(json.dumps(stats, indent=2))
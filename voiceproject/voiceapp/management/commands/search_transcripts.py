@@ -0,0 +1,40 @@
+# voiceapp/management/commands/search_transcripts.py
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+
+from voiceapp.search import rebuild_search_index, search_messages
+
+
+class Command(BaseCommand):
+    help = "Full-text search over saved transcripts; prints ranked hits with conversation ids and timestamps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("query", nargs="?", default="", help="Search terms")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--role", choices=["user", "assistant"], default=None)
+        parser.add_argument("--json", action="store_true", help="Print hits as JSON")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Recreate the search index (and its sqlite triggers) first")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            if async_to_sync(rebuild_search_index)():
+                self.stdout.write("🔎 Search index rebuilt.")
+            else:
+                self.stdout.write("🔎 No search index to rebuild on this database.")
+        if not options["query"]:
+            return
+
+        hits = async_to_sync(search_messages)(options["query"], limit=options["limit"], role=options["role"])
+        if options["json"]:
+            self.stdout.write(json.dumps(hits, indent=2, ensure_ascii=False))
+            return
+        if not hits:
+            self.stdout.write("No matches.")
+            return
+        for h in hits:
+            self.stdout.write(
+                f"{h['rank']:>8.3f}  {h['timestamp']}  {h['conversation_id']}  {h['role']}: {h['snippet']}"
+            )
@@ -0,0 +1,93 @@
+# Full-text search index over Message.content
+#   sqlite   -> external-content FTS5 table kept in sync by triggers
+#   postgres -> generated tsvector column + GIN index
+# Other backends (or sqlite builds without FTS5) fall back to LIKE search.
+#
+# The FTS table and triggers are raw SQL outside Django's model state. On sqlite,
+# a later AlterField (or any schema change Django applies by rebuilding
+# voiceapp_message) drops the triggers silently and the index stops following new
+# rows. Run `python manage.py search_transcripts --rebuild` after such a migration:
+# it re-runs SQLITE_FORWARD below (every statement is idempotent) and re-indexes.
+
+from django.db import migrations, OperationalError
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS voiceapp_message_fts
+    USING fts5(content, content='voiceapp_message', content_rowid='id', tokenize='porter unicode61')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS voiceapp_message_fts_ai AFTER INSERT ON voiceapp_message BEGIN
+        INSERT INTO voiceapp_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS voiceapp_message_fts_ad AFTER DELETE ON voiceapp_message BEGIN
+        INSERT INTO voiceapp_message_fts(voiceapp_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS voiceapp_message_fts_au AFTER UPDATE OF content ON voiceapp_message BEGIN
+        INSERT INTO voiceapp_message_fts(voiceapp_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO voiceapp_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    # backfill existing rows
+    "INSERT INTO voiceapp_message_fts(voiceapp_message_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS voiceapp_message_fts_ai",
+    "DROP TRIGGER IF EXISTS voiceapp_message_fts_ad",
+    "DROP TRIGGER IF EXISTS voiceapp_message_fts_au",
+    "DROP TABLE IF EXISTS voiceapp_message_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE voiceapp_message ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS voiceapp_message_search_gin ON voiceapp_message USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS voiceapp_message_search_gin",
+    "ALTER TABLE voiceapp_message DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except OperationalError:
+            # sqlite built without FTS5: search falls back to LIKE
+            pass
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voiceapp', '0002_remove_conversation_session_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -7,6 +7,12 @@ class Conversation(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # latest conversation lookup on connect
+            models.Index(fields=['created_at'], name='voiceapp_conv_created_idx'),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -24,6 +30,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # history on connect + per-conversation retention scans
+            models.Index(fields=['conversation', 'timestamp'], name='voiceapp_msg_conv_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
\ No newline at end of file
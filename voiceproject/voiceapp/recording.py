@@ -0,0 +1,297 @@
+# voiceapp/recording.py
+"""
+Session recording + deterministic replay for AudioLoop.
+
+On-disk layout (one directory per session, append-only):
+    events.jsonl  -> one JSON record per line: {"t": <seconds since start>, "kind": ..., ...}
+    audio.pcm     -> raw PCM bytes; audio records point into it with "off"/"len"
+
+Replay memory-maps audio.pcm, so frames are handed to AudioLoop as memoryview
+slices without reading the whole file up front.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import mmap
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+from django.conf import settings
+
+EVENTS_FILE = "events.jsonl"
+AUDIO_FILE = "audio.pcm"
+
+# record kinds
+MIC = "mic"          # browser -> server PCM
+TTS = "tts"          # backend -> server PCM
+IN_TEXT = "in_text"  # backend input transcription (user)
+OUT_TEXT = "out_text"  # backend output transcription (assistant)
+EMIT = "emit"        # server -> channel group event
+
+
+# ---------------- Recorder ----------------
+class SessionRecorder:
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._events = open(self.path / EVENTS_FILE, "a", encoding="utf-8")
+        self._audio = open(self.path / AUDIO_FILE, "ab")
+        self._audio_off = self._audio.tell()
+        self._t0 = time.monotonic()
+        self.closed = False
+
+    def _write(self, kind: str, **fields):
+        if self.closed:
+            return
+        fields["t"] = round(time.monotonic() - self._t0, 6)
+        fields["kind"] = kind
+        self._events.write(json.dumps(fields, separators=(",", ":")) + "\n")
+
+    def audio(self, kind: str, data, mime: Optional[str] = None):
+        if self.closed or not data:
+            return
+        n = len(data)
+        self._audio.write(data)
+        self._write(kind, off=self._audio_off, len=n, mime=mime)
+        self._audio_off += n
+
+    def text(self, kind: str, text: str):
+        self._write(kind, text=text)
+
+    def event(self, event: dict):
+        # drop the pre-encoded client payload (audio is already captured as TTS frames)
+        rec = {k: v for k, v in event.items() if k != "json"}
+        self._write(EMIT, event=rec)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._events.close()
+        finally:
+            self._audio.close()
+
+
+def recorder_from_settings(group_name: str) -> Optional[SessionRecorder]:
+    """
+    Return a recorder when VOICE_RECORD_DIR is configured, else None.
+    """
+    root = getattr(settings, "VOICE_RECORD_DIR", None)
+    if not root:
+        return None
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return SessionRecorder(Path(root) / f"{stamp}_{group_name or uuid.uuid4().hex}")
+
+
+# ---------------- Recording reader ----------------
+class SessionRecording:
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / EVENTS_FILE, "r", encoding="utf-8") as fh:
+            self.events = [json.loads(line) for line in fh if line.strip()]
+        self._fh = open(self.path / AUDIO_FILE, "rb")
+        try:
+            self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+        except ValueError:
+            # empty audio file cannot be mapped
+            self._map = None
+            self._view = memoryview(b"")
+
+    def frame(self, rec: dict) -> memoryview:
+        off = rec["off"]
+        return self._view[off:off + rec["len"]]
+
+    def of_kind(self, *kinds: str) -> list:
+        return [r for r in self.events if r.get("kind") in kinds]
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._fh.close()
+
+
+# ---------------- Replay ----------------
+def _response(rec: dict, recording: SessionRecording):
+    """
+    Rebuild a minimal server message shaped like the live API response.
+    """
+    kind = rec["kind"]
+    if kind == TTS:
+        blob = SimpleNamespace(data=bytes(recording.frame(rec)), mime_type=rec.get("mime"))
+        mt = SimpleNamespace(parts=[SimpleNamespace(inline_data=blob)])
+        sc = SimpleNamespace(model_turn=mt, input_transcription=None, output_transcription=None)
+    elif kind == IN_TEXT:
+        sc = SimpleNamespace(model_turn=None, input_transcription=SimpleNamespace(text=rec["text"]),
+                             output_transcription=None)
+    else:
+        sc = SimpleNamespace(model_turn=None, input_transcription=None,
+                             output_transcription=SimpleNamespace(text=rec["text"]))
+    return SimpleNamespace(server_content=sc)
+
+
+async def _wait_until(t0: float, at: float, speed: float):
+    if speed <= 0:
+        await asyncio.sleep(0)
+        return
+    delay = at / speed - (time.monotonic() - t0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    else:
+        await asyncio.sleep(0)
+
+
+class ReplaySession:
+    """
+    Stands in for the live session: accepts sends, yields recorded responses on schedule.
+    """
+
+    def __init__(self, recording: SessionRecording, speed: float = 1.0):
+        self.recording = recording
+        self.speed = speed
+        self.sent = 0
+        self.handle_times: list = []
+        self.done = asyncio.Event()
+        self.t0 = time.monotonic()
+
+    async def send(self, input=None, **kwargs):
+        self.sent += 1
+
+    async def receive(self):
+        if self.done.is_set():
+            # live sessions block between turns; so do we
+            await asyncio.Event().wait()
+        for rec in self.recording.of_kind(TTS, IN_TEXT, OUT_TEXT):
+            await _wait_until(self.t0, rec["t"], self.speed)
+            resp = _response(rec, self.recording)
+            start = time.perf_counter()
+            yield resp
+            # time between yield and resume == time AudioLoop spent handling it
+            self.handle_times.append(time.perf_counter() - start)
+        self.done.set()
+
+
+class _ReplayConnect:
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def __call__(self, model=None, config=None):
+        return self
+
+    async def __aenter__(self):
+        self.session.t0 = time.monotonic()
+        return self.session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class ReplayStore:
+    """
+    In-memory stand-in for db_helpers: a replay never reads or appends to real conversations.
+    """
+
+    def __init__(self):
+        self.saved: list = []
+
+    async def getlatest(self) -> str:
+        return "replay"
+
+    async def gethistory(self, conversation_id) -> str:
+        from .db_helpers import NO_HISTORY
+        return NO_HISTORY
+
+    async def getsave_message(self, conversation_id, role: str, content: str) -> None:
+        self.saved.append((role, content))
+
+
+def _summary(samples: list) -> dict:
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "max_ms": round(max(samples) * 1000, 4),
+    }
+
+
+async def replay(path: str | Path, speed: float = 1.0, stdout=None) -> dict:
+    """
+    Drive a fresh AudioLoop from a recording. speed=1 is real time, >1 accelerated,
+    0 as fast as possible. Returns timing stats for the hot paths.
+    Transcripts are committed to a ReplayStore, never the database.
+    """
+    from .utils import AudioLoop, SEND_RATE
+
+    recording = SessionRecording(path)
+    session = ReplaySession(recording, speed=speed)
+    store = ReplayStore()
+    loop = AudioLoop(
+        pya_instance=None,
+        stdout=stdout,
+        browser_mode=True,
+        group_name=f"replay_{uuid.uuid4().hex}",
+        connect=_ReplayConnect(session),
+        cache=None,
+        store=store,
+    )
+
+    emitted = 0
+    broadcast = loop._broadcast
+
+    async def counting_broadcast(event: dict):
+        nonlocal emitted
+        emitted += 1
+        await broadcast(event)
+
+    loop._broadcast = counting_broadcast
+
+    push_times = []
+
+    async def feed_mic():
+        # wait until the session is up so timings share the same origin
+        while loop.session is None and not run_task.done():
+            await asyncio.sleep(0.005)
+        for rec in recording.of_kind(MIC):
+            if run_task.done():
+                return
+            await _wait_until(session.t0, rec["t"], speed)
+            start = time.perf_counter()
+            await loop.push_client_audio(bytes(recording.frame(rec)), rec.get("mime") or f"audio/pcm;rate={SEND_RATE}")
+            push_times.append(time.perf_counter() - start)
+
+    wall0 = time.perf_counter()
+    run_task = asyncio.create_task(loop.run())
+    try:
+        await feed_mic()
+        done = asyncio.create_task(session.done.wait())
+        # run() ends early if the session could not start (e.g. no DB)
+        await asyncio.wait({done, run_task}, return_when=asyncio.FIRST_COMPLETED)
+        done.cancel()
+        # drain queued mic frames to the fake session
+        while not loop.to_send.empty() and not run_task.done():
+            await asyncio.sleep(0.005)
+    finally:
+        await loop.stop()
+        await asyncio.gather(run_task, return_exceptions=True)
+        recording.close()
+
+    return {
+        "recording": str(path),
+        "speed": speed,
+        "wall_s": round(time.perf_counter() - wall0, 4),
+        "sent_upstream": session.sent,
+        "transcripts_committed": len(store.saved),
+        "broadcast_events": emitted,
+        "push_client_audio": _summary(push_times),
+        "handle_response": _summary(session.handle_times),
+    }
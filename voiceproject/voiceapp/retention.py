@@ -0,0 +1,259 @@
+# voiceapp/retention.py
+"""
+Transcript retention job: coalesce duplicate rolling-text rows, archive old
+conversations to gzip JSONL (one file per conversation) and prune them from
+the hot tables in small batches so no single transaction holds the DB for long.
+
+Rows are deleted only once they are read back from the archive on disk, and a
+rerun merges into an existing archive instead of replacing it, so a crash
+partway through pruning never loses messages.
+
+Coalescing is incremental: <archive_dir>/.coalesce_watermark holds the highest
+message id already coalesced, and each run only rescans conversations with
+newer rows (delete the file to force a full pass).
+
+Scheduler-friendly: run_retention() is sync, idempotent and returns stats;
+`python manage.py compact_transcripts` wraps it for cron.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+from itertools import groupby
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from django.conf import settings
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, Message
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_S = 0.05
+COALESCE_WATERMARK = ".coalesce_watermark"
+
+
+def _chunks(ids: List, size: int) -> Iterator[List]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _delete_in_batches(model, ids: List, batch_size: int, pause_s: float) -> int:
+    """
+    DELETE ... WHERE id IN (<batch>) per autocommit transaction, pausing between batches.
+    """
+    deleted = 0
+    for chunk in _chunks(ids, batch_size):
+        n, _ = model.objects.filter(id__in=chunk).delete()
+        deleted += n
+        if pause_s:
+            time.sleep(pause_s)
+    return deleted
+
+
+# ---------------- Coalesce per-turn duplicates ----------------
+def _superseded_ids(rows: Iterable[tuple]) -> List[int]:
+    """
+    rows: (id, role, content) oldest -> newest for one conversation.
+    Within a run of same-role rows, a row whose text is repeated or extended by
+    its neighbour is a stale rolling snapshot; keep only the most complete one.
+    """
+    stale = []
+    prev = None  # (id, role, content) of the surviving row in the current run
+    for row in rows:
+        mid, role, content = row
+        if prev and prev[1] == role:
+            if content.startswith(prev[2]):
+                stale.append(prev[0])
+                prev = row
+                continue
+            if prev[2].startswith(content):
+                stale.append(mid)
+                continue
+        prev = row
+    return stale
+
+
+def conversations_with_messages_after(message_id: int) -> List:
+    """Ids of conversations holding a message with id > message_id."""
+    return list(
+        Message.objects.filter(id__gt=message_id)
+        .order_by()
+        .values_list("conversation_id", flat=True)
+        .distinct()
+    )
+
+
+def coalesce_duplicates(conversation_ids: Optional[List] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                        pause_s: float = DEFAULT_PAUSE_S, dry_run: bool = False) -> int:
+    """
+    Delete superseded rolling-text rows in `conversation_ids` (all conversations when None).
+    Rows are read with one query per `batch_size` conversations.
+    """
+    if conversation_ids is None:
+        conversation_ids = list(Conversation.objects.values_list("id", flat=True))
+    stale = []
+    for chunk in _chunks(list(conversation_ids), batch_size):
+        rows = (
+            Message.objects.filter(conversation_id__in=chunk)
+            .order_by("conversation_id", "timestamp", "id")
+            .values_list("conversation_id", "id", "role", "content")
+        )
+        for _, conv_rows in groupby(rows.iterator(), key=lambda r: r[0]):
+            stale.extend(_superseded_ids(r[1:] for r in conv_rows))
+    if dry_run:
+        return len(stale)
+    return _delete_in_batches(Message, stale, batch_size, pause_s)
+
+
+def _read_watermark(path: Path) -> int:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def coalesce_new_messages(archive_dir: Path, batch_size: int = DEFAULT_BATCH_SIZE,
+                          pause_s: float = DEFAULT_PAUSE_S, dry_run: bool = False) -> int:
+    """
+    Coalesce only conversations that gained rows since the last run, then advance the watermark.
+    """
+    path = archive_dir / COALESCE_WATERMARK
+    since = _read_watermark(path)
+    # read the high mark first: rows inserted meanwhile are rescanned next run rather than skipped
+    high = Message.objects.aggregate(high=Max("id"))["high"] or 0
+    if high <= since:
+        return 0
+    removed = coalesce_duplicates(conversations_with_messages_after(since), batch_size=batch_size,
+                                  pause_s=pause_s, dry_run=dry_run)
+    if not dry_run:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(str(high))
+    return removed
+
+
+# ---------------- Archive + prune old conversations ----------------
+def _archive_path(archive_dir: Path, conv: Conversation) -> Path:
+    return archive_dir / conv.created_at.strftime("%Y-%m") / f"{conv.id}.jsonl.gz"
+
+
+def _archived_messages(path: Path) -> Dict[int, dict]:
+    """Message records already in an archive file, by message id (empty if there is none)."""
+    if not path.exists():
+        return {}
+    records = {}
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            rec = json.loads(line)
+            if rec.get("type") == "message":
+                records[rec["id"]] = rec
+    return records
+
+
+def archived_message_ids(path: Path) -> Set[int]:
+    return set(_archived_messages(path))
+
+
+def archive_conversation(conv: Conversation, archive_dir: Path) -> Path:
+    """
+    Write one conversation (header line + one line per message) to <archive_dir>/<YYYY-MM>/<id>.jsonl.gz.
+    An existing archive (e.g. from a run that crashed mid-prune) is merged with the rows
+    still in the DB, deduplicated by message id, never overwritten with fewer messages.
+    """
+    path = _archive_path(archive_dir, conv)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = _archived_messages(path)
+    rows = (
+        Message.objects.filter(conversation_id=conv.id)
+        .values_list("id", "role", "content", "timestamp")
+    )
+    for mid, role, content, ts in rows.iterator():
+        records[mid] = {
+            "type": "message",
+            "id": mid,
+            "role": role,
+            "content": content,
+            "timestamp": ts.isoformat(),
+        }
+
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        fh.write(json.dumps({
+            "type": "conversation",
+            "id": str(conv.id),
+            "created_at": conv.created_at.isoformat(),
+        }) + "\n")
+        for rec in sorted(records.values(), key=lambda r: (r["timestamp"], r["id"])):
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    # durable before it replaces the old archive and before any row is deleted
+    with open(tmp, "rb") as fh:
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def stale_conversations(days: int):
+    """
+    Conversations with no activity in `days` days, never the latest one (it is resumed on connect).
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    latest = Conversation.objects.order_by("-created_at").values_list("id", flat=True).first()
+    return (
+        Conversation.objects.exclude(id=latest)
+        .annotate(last_activity=Coalesce(Max("messages__timestamp"), "created_at"))
+        .filter(last_activity__lt=cutoff)
+        .order_by("created_at")
+    )
+
+
+def archive_and_prune(days: int, archive_dir: Path, batch_size: int = DEFAULT_BATCH_SIZE,
+                      pause_s: float = DEFAULT_PAUSE_S, dry_run: bool = False) -> dict:
+    stats = {"conversations_archived": 0, "conversations_deferred": 0, "messages_pruned": 0}
+    # materialize first: rows are deleted while we walk the list
+    for conv in list(stale_conversations(days)):
+        msg_ids = list(Message.objects.filter(conversation_id=conv.id).values_list("id", flat=True))
+        if dry_run:
+            stats["conversations_archived"] += 1
+            stats["messages_pruned"] += len(msg_ids)
+            continue
+        path = archive_conversation(conv, archive_dir)
+        # delete only what the archive on disk is confirmed to hold
+        archived = archived_message_ids(path)
+        stats["messages_pruned"] += _delete_in_batches(
+            Message, [mid for mid in msg_ids if mid in archived], batch_size, pause_s,
+        )
+        # rows that arrived meanwhile would cascade away unarchived; keep the conversation for the next run
+        if Message.objects.filter(conversation_id=conv.id).exists():
+            stats["conversations_deferred"] += 1
+            continue
+        Conversation.objects.filter(id=conv.id).delete()
+        stats["conversations_archived"] += 1
+    return stats
+
+
+# ---------------- Job entry point ----------------
+def run_retention(days: Optional[int] = None, archive_dir: Optional[str | Path] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE, pause_s: float = DEFAULT_PAUSE_S,
+                  coalesce: bool = True, dry_run: bool = False) -> dict:
+    """
+    Coalesce duplicates, then archive + prune conversations idle for `days` days.
+    Defaults come from VOICE_RETENTION_DAYS / VOICE_ARCHIVE_DIR.
+    """
+    days = days if days is not None else getattr(settings, "VOICE_RETENTION_DAYS", 30)
+    archive_dir = Path(archive_dir or getattr(settings, "VOICE_ARCHIVE_DIR", "archive"))
+    start = time.perf_counter()
+
+    stats = {"dry_run": dry_run, "days": days, "archive_dir": str(archive_dir)}
+    stats["duplicates_removed"] = (
+        coalesce_new_messages(archive_dir, batch_size=batch_size, pause_s=pause_s, dry_run=dry_run)
+        if coalesce else 0
+    )
+    stats.update(archive_and_prune(days, archive_dir, batch_size=batch_size, pause_s=pause_s, dry_run=dry_run))
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return stats
@@ -0,0 +1,96 @@
+# voiceapp/ringbuffer.py
+"""
+Preallocated per-session PCM ring buffer.
+
+Frames are copied once into a fixed bytearray and described by small
+__slots__ PcmFrame objects; readers get memoryview slices (no extra copies).
+Frames are always stored contiguously, so adjacent frames can be read back
+as one span. Release must happen in FIFO order (oldest frame first).
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+class PcmFrame:
+    __slots__ = ("offset", "length", "mime", "data")
+
+    def __init__(self, offset: int, length: int, mime: Optional[str] = None, data=None):
+        self.offset = offset    # -1 when the frame did not fit and owns `data`
+        self.length = length
+        self.mime = mime
+        self.data = data
+
+    @classmethod
+    def detached(cls, data, mime: Optional[str] = None) -> "PcmFrame":
+        return cls(-1, len(data), mime, bytes(data))
+
+    def follows(self, other: "PcmFrame") -> bool:
+        """True if this frame sits right after `other` in the same ring."""
+        return self.offset >= 0 and other.offset >= 0 and self.offset == other.offset + other.length
+
+
+class PcmRing:
+    __slots__ = ("capacity", "_buf", "_view", "_head", "_tail", "_live")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0   # next write offset
+        self._tail = 0   # start of oldest live frame
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def write(self, data, mime: Optional[str] = None) -> Optional[PcmFrame]:
+        """
+        Copy `data` into the ring; returns None when there is no contiguous room.
+        """
+        n = len(data)
+        if not n or n > self.capacity:
+            return None
+        if not self._live:
+            self._head = self._tail = 0
+
+        head, tail = self._head, self._tail
+        if head >= tail:
+            # live data is [tail, head): room at the end, else wrap to the start
+            if self.capacity - head >= n:
+                off = head
+            elif tail > n:
+                off = 0
+            else:
+                return None
+        else:
+            # wrapped: free space is [head, tail)
+            if tail - head > n:
+                off = head
+            else:
+                return None
+
+        self._view[off:off + n] = data
+        self._head = off + n
+        self._live += 1
+        return PcmFrame(off, n, mime)
+
+    def view(self, frame: PcmFrame, length: Optional[int] = None) -> memoryview:
+        """Zero-copy view of `frame` (or `length` bytes starting at it)."""
+        n = frame.length if length is None else length
+        if frame.offset < 0:
+            return memoryview(frame.data)[:n]
+        return self._view[frame.offset:frame.offset + n]
+
+    def release(self, frame: PcmFrame, count: int = 1):
+        """Release `frame` and the `count - 1` frames before it."""
+        if frame.offset < 0:
+            return
+        self._tail = frame.offset + frame.length
+        self._live -= count
+        if self._live <= 0:
+            self.clear()
+
+    def clear(self):
+        self._head = self._tail = self._live = 0
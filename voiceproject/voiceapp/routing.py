@@ -1,7 +1,8 @@
 # voiceapp/routing.py
 from django.urls import re_path
-from .consumers import TranscriptConsumer
+from .consumers import TranscriptConsumer, ObserverConsumer
 
 websocket_urlpatterns = [
     re_path(r"^ws/voice/$", TranscriptConsumer.as_asgi()),
-]
\ No newline at end of file
+    re_path(r"^ws/voice/observe/(?P<session_id>[0-9a-f]{32})/$", ObserverConsumer.as_asgi()),
+]
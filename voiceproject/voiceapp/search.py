@@ -0,0 +1,143 @@
+# voiceapp/search.py
+"""
+Ranked full-text search over Message.content.
+
+Index lives in the database (see migration 0003_message_search):
+  sqlite   -> voiceapp_message_fts (FTS5, bm25 ranking), synced by triggers on every insert/update/delete
+  postgres -> voiceapp_message.search_vector (generated tsvector, GIN index, ts_rank)
+Anything else falls back to a LIKE scan ordered by recency.
+
+Rebuilding also recreates the sqlite FTS table and triggers, which a table-rebuilding
+migration on voiceapp_message drops.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import connection, DatabaseError, OperationalError
+
+from .models import Message
+
+SNIPPET_TOKENS = 12
+
+
+def _fts5_query(query: str) -> str:
+    # quote every term so user input can't hit FTS5 syntax (AND/OR/NEAR, quotes, colons)
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def _has_fts5() -> bool:
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='voiceapp_message_fts'")
+        return cur.fetchone() is not None
+
+
+def _ranked_ids_sqlite(query: str, limit: int, role: Optional[str]):
+    sql = (
+        "SELECT m.id, snippet(voiceapp_message_fts, 0, '[', ']', '…', %s), bm25(voiceapp_message_fts) AS rank "
+        "FROM voiceapp_message_fts JOIN voiceapp_message m ON m.id = voiceapp_message_fts.rowid "
+        "WHERE voiceapp_message_fts MATCH %s"
+    )
+    params = [SNIPPET_TOKENS, _fts5_query(query)]
+    if role:
+        sql += " AND m.role = %s"
+        params.append(role)
+    # bm25() is lower-is-better; negate so higher rank == better on every backend
+    sql += " ORDER BY rank LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return [(mid, snippet, -rank) for mid, snippet, rank in cur.fetchall()]
+
+
+def _ranked_ids_postgres(query: str, limit: int, role: Optional[str]):
+    sql = (
+        "SELECT m.id, ts_headline('english', m.content, q, 'MaxWords=24, MinWords=8'), "
+        "ts_rank(m.search_vector, q) AS rank "
+        "FROM voiceapp_message m, websearch_to_tsquery('english', %s) q "
+        "WHERE m.search_vector @@ q"
+    )
+    params = [query]
+    if role:
+        sql += " AND m.role = %s"
+        params.append(role)
+    sql += " ORDER BY rank DESC LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def _ranked_ids_like(query: str, limit: int, role: Optional[str]):
+    qs = Message.objects.filter(content__icontains=query)
+    if role:
+        qs = qs.filter(role=role)
+    rows = qs.order_by("-timestamp").values_list("id", "content")[:limit]
+    return [(mid, content[:200], 0.0) for mid, content in rows]
+
+
+def _search_messages_sync(query: str, limit: int = 20, role: Optional[str] = None) -> List[dict]:
+    """
+    Return ranked hits (best first):
+    {"message_id", "conversation_id", "role", "timestamp", "snippet", "rank"}
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    vendor = connection.vendor
+    ranked = None
+    try:
+        if vendor == "sqlite" and _has_fts5():
+            ranked = _ranked_ids_sqlite(query, limit, role)
+        elif vendor == "postgresql":
+            ranked = _ranked_ids_postgres(query, limit, role)
+    except DatabaseError:
+        ranked = None
+    if ranked is None:
+        ranked = _ranked_ids_like(query, limit, role)
+
+    messages = Message.objects.in_bulk([mid for mid, _, _ in ranked])
+    hits = []
+    for mid, snippet, rank in ranked:
+        m = messages.get(mid)
+        if m is None:
+            continue
+        hits.append({
+            "message_id": m.id,
+            "conversation_id": str(m.conversation_id),
+            "role": m.role,
+            "timestamp": m.timestamp.isoformat(),
+            "snippet": snippet,
+            "rank": round(float(rank), 4),
+        })
+    return hits
+
+
+def _rebuild_search_index_sync() -> bool:
+    """
+    Recreate the sqlite FTS5 table + sync triggers if missing and re-index every message.
+    Returns False when there is nothing to rebuild (postgres keeps a generated column;
+    sqlite without FTS5 uses LIKE).
+    """
+    if connection.vendor != "sqlite":
+        return False
+    # same idempotent statements as the migration that created the index
+    statements = import_module("voiceapp.migrations.0003_message_search").SQLITE_FORWARD
+    try:
+        with connection.cursor() as cur:
+            for sql in statements:
+                cur.execute(sql)
+    except OperationalError:
+        return False
+    return True
+
+
+search_messages = sync_to_async(_search_messages_sync)
+rebuild_search_index = sync_to_async(_rebuild_search_index_sync)
+
+__all__ = ["search_messages", "rebuild_search_index"]
@@ -0,0 +1,121 @@
+# voiceapp/sessions.py
+"""
+Process-local registry of live voice sessions, used by observers, the listing view
+and the quota reaper.
+
+The reaper wakes every VOICE_SESSION_REAP_INTERVAL_S and ends sessions that exceed
+VOICE_SESSION_MAX_DURATION_S, VOICE_SESSION_MAX_IDLE_S or VOICE_SESSION_MAX_BYTES
+(0/None disables a limit): the AudioLoop is stopped, which releases its Gemini
+connection, and the browser socket is closed with code 4408.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+QUOTA_CLOSE_CODE = 4408
+
+
+class LiveSession:
+    __slots__ = ("started_at", "audio", "close")
+
+    def __init__(self, audio=None, close=None):
+        self.started_at = time.time()
+        self.audio = audio    # AudioLoop (has .usage / .stop())
+        self.close = close    # async callable(code=...) closing the client socket
+
+    @property
+    def usage(self):
+        return getattr(self.audio, "usage", None)
+
+
+# session id (hex of the voice_<id> group) -> LiveSession
+LIVE_SESSIONS = {}
+_reaper_task = None
+
+
+def session_started(session_id: str, audio=None, close=None):
+    LIVE_SESSIONS[session_id] = LiveSession(audio, close)
+    _ensure_reaper()
+
+
+def session_ended(session_id: str):
+    LIVE_SESSIONS.pop(session_id, None)
+
+
+def observer_allowed(user) -> bool:
+    if not getattr(settings, "VOICE_OBSERVERS_REQUIRE_STAFF", True):
+        return True
+    return bool(user and getattr(user, "is_staff", False))
+
+
+# ---------------- Quotas ----------------
+def quota_limits() -> dict:
+    return {
+        "max_duration_s": getattr(settings, "VOICE_SESSION_MAX_DURATION_S", 1800),
+        "max_idle_s": getattr(settings, "VOICE_SESSION_MAX_IDLE_S", 120),
+        "max_bytes": getattr(settings, "VOICE_SESSION_MAX_BYTES", None),
+    }
+
+
+def quota_breach(usage, limits: dict, now=None):
+    """Name of the first exceeded limit, or None."""
+    if usage is None:
+        return None
+    now = now or time.time()
+    if limits["max_duration_s"] and usage.duration(now) > limits["max_duration_s"]:
+        return "max_duration"
+    if limits["max_idle_s"] and usage.idle_for(now) > limits["max_idle_s"]:
+        return "idle"
+    if limits["max_bytes"] and usage.total_bytes() > limits["max_bytes"]:
+        return "max_bytes"
+    return None
+
+
+async def reap_sessions(now=None) -> list:
+    """End every session over quota; returns [(session_id, reason)]."""
+    limits = quota_limits()
+    reaped = []
+    for sid, live in list(LIVE_SESSIONS.items()):
+        reason = quota_breach(live.usage, limits, now)
+        if not reason:
+            continue
+        live.usage.ended_reason = reason
+        logger.info("Reaping voice session %s (%s): %s", sid, reason, live.usage.as_dict())
+        session_ended(sid)
+        try:
+            await live.audio.stop()
+        except Exception:
+            logger.exception("Stopping voice session %s failed", sid)
+        if live.close:
+            try:
+                await live.close(code=QUOTA_CLOSE_CODE)
+            except Exception:
+                pass
+        reaped.append((sid, reason))
+    return reaped
+
+
+async def _reaper():
+    interval = getattr(settings, "VOICE_SESSION_REAP_INTERVAL_S", 5)
+    while LIVE_SESSIONS:
+        await asyncio.sleep(interval)
+        try:
+            await reap_sessions()
+        except Exception:
+            logger.exception("Session reaper failed")
+
+
+def _ensure_reaper():
+    # one reaper per process, started with the first session and exiting with the last
+    global _reaper_task
+    if _reaper_task and not _reaper_task.done():
+        return
+    try:
+        _reaper_task = asyncio.get_running_loop().create_task(_reaper())
+    except RuntimeError:
+        _reaper_task = None  # no running loop (sync caller): nothing to reap from
@@ -0,0 +1,23 @@
+# voiceapp/sqlite_profile.py
+"""
+Opt-in SQLite performance profile (VOICE_SQLITE_TUNED=1): pragmas applied to
+every new connection. See settings.py for the CONN_MAX_AGE / timeout half.
+"""
+
+from django.conf import settings
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",      # readers don't block the writer and vice versa
+    "synchronous": "NORMAL",    # fsync on checkpoint, not every commit (safe with WAL)
+    "busy_timeout": 20000,      # ms to wait on a lock instead of "database is locked"
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "VOICE_SQLITE_PRAGMAS", DEFAULT_PRAGMAS)
+    with connection.cursor() as cur:
+        for name, value in pragmas.items():
+            cur.execute(f"PRAGMA {name}={value}")
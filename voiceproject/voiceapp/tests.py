@@ -1,3 +1,293 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace as NS
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from voiceapp import retention, search, utils
+from voiceapp.audio_cache import ResponseAudioCache
+from voiceapp.models import Conversation, Message
+from voiceapp.recording import ReplayStore
+from voiceapp.ringbuffer import PcmFrame, PcmRing
+
+
+# ---------------- PCM ring ----------------
+class PcmRingTests(SimpleTestCase):
+    def test_write_and_view_round_trip(self):
+        ring = PcmRing(16)
+        frame = ring.write(b"abcd", "audio/pcm")
+        self.assertEqual((frame.offset, frame.length, frame.mime), (0, 4, "audio/pcm"))
+        self.assertEqual(bytes(ring.view(frame)), b"abcd")
+        self.assertEqual(len(ring), 1)
+
+    def test_adjacent_frames_read_back_as_one_span(self):
+        ring = PcmRing(16)
+        frames = [ring.write(chunk) for chunk in (b"aaa", b"bbb", b"ccc")]
+        self.assertTrue(frames[1].follows(frames[0]))
+        self.assertTrue(frames[2].follows(frames[1]))
+        self.assertEqual(bytes(ring.view(frames[0], 9)), b"aaabbbccc")
+        ring.release(frames[2], 3)
+        self.assertEqual(len(ring), 0)
+
+    def test_wraps_to_start_once_head_space_is_released(self):
+        ring = PcmRing(10)
+        first = ring.write(b"111111")
+        second = ring.write(b"22")
+        ring.release(first)
+        wrapped = ring.write(b"3333")   # no room at the end: goes to the freed start
+        self.assertEqual(wrapped.offset, 0)
+        self.assertFalse(wrapped.follows(second))
+        self.assertEqual(bytes(ring.view(second)), b"22")
+        self.assertEqual(bytes(ring.view(wrapped)), b"3333")
+
+    def test_full_ring_refuses_write_until_release(self):
+        ring = PcmRing(8)
+        first = ring.write(b"aaaa")
+        ring.write(b"bbbb")
+        self.assertIsNone(ring.write(b"c"))
+        self.assertIsNone(ring.write(b"x" * 9))
+        ring.release(first)
+        self.assertIsNotNone(ring.write(b"ccc"))
+
+    def test_release_of_last_frame_resets_offsets(self):
+        ring = PcmRing(8)
+        ring.release(ring.write(b"abcdef"))
+        self.assertEqual(ring.write(b"abcdef").offset, 0)
+
+    def test_detached_frame_owns_its_data(self):
+        ring = PcmRing(4)
+        frame = PcmFrame.detached(bytearray(b"abcdefgh"))
+        self.assertEqual(frame.offset, -1)
+        self.assertEqual(bytes(ring.view(frame, 3)), b"abc")
+        ring.release(frame)   # no-op for detached frames
+        self.assertEqual(len(ring), 0)
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, input=None):
+        self.sent.append(input)
+
+
+class MicCoalescingTests(SimpleTestCase):
+    def test_queued_frames_are_sent_as_one_chunk(self):
+        loop = utils.AudioLoop(None, None, True, "voice_test", cache=None, tools=None)
+        loop.session = _RecordingSession()
+
+        gauges = []
+
+        async def send_all():
+            loop.user_speaking = True
+            for chunk in (b"aa", b"bb", b"cc"):
+                await loop.push_client_audio(chunk, "audio/pcm;rate=16000")
+            await loop.push_client_audio(b"dd", "audio/pcm;rate=8000")
+            gauges.append(loop.usage.as_dict())
+            await loop._send_next()
+            await loop._send_next()
+
+        asyncio.run(send_all())
+        self.assertEqual(loop.session.sent, [
+            {"data": b"aabbcc", "mime_type": "audio/pcm;rate=16000"},
+            {"data": b"dd", "mime_type": "audio/pcm;rate=8000"},
+        ])
+        self.assertEqual(loop.usage.upstream_frames, 4)
+        ring = utils.OUT_RING_BYTES
+        self.assertEqual((gauges[0]["mem_bytes"], gauges[0]["queued_frames"]), (ring + 8, 4))
+        usage = loop.usage.as_dict()
+        self.assertEqual((usage["mem_bytes"], usage["queued_frames"], usage["tool_tasks"]), (ring, 0, 0))
+
+
+# ---------------- Greeting cache ----------------
+def _server_content(**fields):
+    sc = dict(input_transcription=None, output_transcription=None, model_turn=None,
+              interrupted=None, turn_complete=None)
+    sc.update(fields)
+    return NS(server_content=NS(**sc), tool_call=None, tool_call_cancellation=None)
+
+
+class _GreetingSession:
+    def __init__(self, ending, chunks):
+        self.sent = []
+        self.ending = ending
+        self.chunks = chunks
+        self.replied = False
+
+    async def send(self, input=None):
+        self.sent.append(input)
+
+    async def receive(self):
+        if self.sent and not self.replied:
+            self.replied = True
+            for word in ("Hello,", " I'm", " Arjun."):
+                yield _server_content(output_transcription=NS(text=word))
+            for _ in range(self.chunks):
+                yield _server_content(model_turn=NS(parts=[NS(inline_data=NS(data=b"\x01" * 4800))]))
+            yield _server_content(**{self.ending: True})
+        await asyncio.sleep(0.02)
+
+
+class _GreetingConnect:
+    def __init__(self, ending="turn_complete", chunks=5):
+        self.ending = ending
+        self.chunks = chunks
+        self.instructions = []
+
+    def __call__(self, model, config):
+        self.instructions.append(config["system_instruction"]["parts"][0]["text"])
+        self.session = _GreetingSession(self.ending, self.chunks)
+        return self
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _HistoryStore(ReplayStore):
+    async def gethistory(self, conversation_id):
+        return "Previous conversation:\nUser: my name is Ravi"
+
+
+class GreetingCacheTests(SimpleTestCase):
+    def _run_session(self, connect, store=None):
+        cache = ResponseAudioCache(max_bytes=10 ** 6, disk_dir=tempfile.mkdtemp())
+        loop = utils.AudioLoop(None, None, True, "voice_test", connect=connect, cache=cache,
+                               store=store or ReplayStore())
+
+        async def session():
+            task = asyncio.create_task(loop.run())
+            await asyncio.sleep(0.3)
+            await loop.stop()
+            await task
+
+        asyncio.run(session())
+        return cache.get(loop._greeting_key)
+
+    def test_merge_transcript(self):
+        self.assertEqual(utils.merge_transcript("Hello,", " there"), "Hello, there")
+        self.assertEqual(utils.merge_transcript("Hello,", "Hello, there"), "Hello, there")
+        self.assertEqual(utils.merge_transcript("Hello, there", "there"), "Hello, there")
+        self.assertEqual(utils.merge_transcript("", "Hi"), "Hi")
+
+    def test_complete_greeting_is_cached_with_full_transcript(self):
+        entry = self._run_session(_GreetingConnect())
+        self.assertEqual(entry.text, "Hello, I'm Arjun.")
+        self.assertEqual(len(entry.audio), 5 * 4800)
+
+    def test_greeting_is_generated_without_history(self):
+        connect = _GreetingConnect()
+        entry = self._run_session(connect, _HistoryStore())
+        self.assertIsNotNone(entry)
+        # main session sees the history, the warm-up connection does not
+        self.assertIn("Ravi", connect.instructions[0])
+        self.assertNotIn("Ravi", connect.instructions[1])
+
+    def test_interrupted_or_short_greeting_is_not_cached(self):
+        self.assertIsNone(self._run_session(_GreetingConnect(ending="interrupted")))
+        self.assertIsNone(self._run_session(_GreetingConnect(chunks=1)))
+
+
+# ---------------- Retention ----------------
+class SupersededIdsTests(SimpleTestCase):
+    def test_keeps_most_complete_snapshot_of_a_turn(self):
+        rows = [(1, "user", "Hi"), (2, "user", "Hi there"), (3, "user", "Hi there, Arjun")]
+        self.assertEqual(retention._superseded_ids(rows), [1, 2])
+
+    def test_drops_shorter_repeat_after_the_full_text(self):
+        rows = [(1, "assistant", "Hello, how can"), (2, "assistant", "Hello, how")]
+        self.assertEqual(retention._superseded_ids(rows), [2])
+
+    def test_role_change_or_new_text_starts_a_new_turn(self):
+        rows = [
+            (1, "user", "Hi"),
+            (2, "assistant", "Hi"),
+            (3, "assistant", "Something else"),
+            (4, "user", "Hi"),
+        ]
+        self.assertEqual(retention._superseded_ids(rows), [])
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.archive_dir = Path(tempfile.mkdtemp())
+
+    def _conversation(self, contents, days_old=0):
+        conv = Conversation.objects.create()
+        for role, content in contents:
+            Message.objects.create(conversation=conv, role=role, content=content)
+        if days_old:
+            old = timezone.now() - timedelta(days=days_old)
+            Conversation.objects.filter(id=conv.id).update(created_at=old)
+            Message.objects.filter(conversation=conv).update(timestamp=old)
+            conv.refresh_from_db()
+        return conv
+
+    def _archived_contents(self, conv):
+        path = retention._archive_path(self.archive_dir, conv)
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return [r["content"] for r in map(json.loads, fh) if r["type"] == "message"]
+
+    def test_rerun_after_crash_mid_prune_merges_the_archive(self):
+        turns = [("user", f"question {i}") if i % 2 else ("assistant", f"answer {i}") for i in range(10)]
+        old = self._conversation(turns, days_old=60)
+        self._conversation([("user", "latest")])
+
+        # first run archived everything, then crashed after pruning part of the rows
+        retention.archive_conversation(old, self.archive_dir)
+        first_half = list(Message.objects.filter(conversation=old).order_by("id").values_list("id", flat=True)[:5])
+        Message.objects.filter(id__in=first_half).delete()
+
+        stats = retention.archive_and_prune(30, self.archive_dir, pause_s=0)
+        self.assertEqual(stats["conversations_archived"], 1)
+        self.assertEqual(stats["messages_pruned"], 5)
+        self.assertFalse(Conversation.objects.filter(id=old.id).exists())
+        self.assertEqual(self._archived_contents(old), [content for _, content in turns])
+
+    def test_coalescing_only_rescans_conversations_with_new_rows(self):
+        self._conversation([("user", "Hi"), ("user", "Hi there")])
+        self.assertEqual(retention.coalesce_new_messages(self.archive_dir, pause_s=0), 1)
+
+        changed = self._conversation([("assistant", "Sure"), ("assistant", "Sure, one moment")])
+        since = int((self.archive_dir / retention.COALESCE_WATERMARK).read_text())
+        self.assertEqual(retention.conversations_with_messages_after(since), [changed.id])
+        with self.assertNumQueries(4):
+            # high mark, changed conversations, their rows, one delete batch
+            self.assertEqual(retention.coalesce_new_messages(self.archive_dir, pause_s=0), 1)
+        self.assertEqual(
+            list(Message.objects.filter(conversation=changed).values_list("content", flat=True)),
+            ["Sure, one moment"],
+        )
+        self.assertEqual(retention.coalesce_new_messages(self.archive_dir, pause_s=0), 0)
+
+
+# ---------------- Search ----------------
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        if connection.vendor != "sqlite" or not search._has_fts5():
+            self.skipTest("sqlite FTS5 index not available")
+        self.conv = Conversation.objects.create()
+
+    def _found(self, query):
+        return [h["snippet"] for h in search._search_messages_sync(query)]
+
+    def test_rebuild_recreates_triggers_dropped_by_a_table_rebuild(self):
+        with connection.cursor() as cur:
+            for name in ("ai", "ad", "au"):
+                cur.execute(f"DROP TRIGGER voiceapp_message_fts_{name}")
+        Message.objects.create(conversation=self.conv, role="user", content="orphaned sunroof")
+        self.assertEqual(self._found("sunroof"), [])
+
+        self.assertTrue(search._rebuild_search_index_sync())
+        self.assertEqual(self._found("sunroof"), ["orphaned [sunroof]"])
+        # triggers are back: new rows are indexed without another rebuild
+        Message.objects.create(conversation=self.conv, role="user", content="heated seats")
+        self.assertEqual(self._found("seats"), ["heated [seats]"])
@@ -1,28 +1,168 @@
-# THIS FILE WAS MOVED FROM management/commands AS IT IS NOT CURRENTLY IN USE.
+# voiceapp/tools.py
+"""
+Tool registry for the Gemini Live session.
+
+Each tool has a function declaration (sent in the session config), a per-call
+timeout and an optional TTL result cache. Calls run as their own tasks so the
+audio receive path never waits on them; sync functions go to a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
 import datetime
-from google.generativeai.protos import Tool, FunctionDeclaration, Schema
-from google.generativeai.types.content_types import ContentType
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_TOOL_TIMEOUT_S = 5.0
+TOOL_CACHE_MAX_ENTRIES = 1024
+
+
+@dataclass
+class Tool:
+    name: str
+    func: Callable[..., Any]
+    description: str
+    parameters: Optional[dict] = None
+    timeout_s: float = DEFAULT_TOOL_TIMEOUT_S
+    cache_ttl_s: float = 0.0  # 0 disables the result cache
+
+    def declaration(self) -> dict:
+        decl = {"name": self.name, "description": self.description}
+        if self.parameters:
+            decl["parameters"] = self.parameters
+        return decl
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cache_hits: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def observe(self, ms: float):
+        self.calls += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+        }
+
+
+class ToolRegistry:
+
+    def __init__(self, cache_max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self._tools: Dict[str, Tool] = {}
+        self._cache: Dict[tuple, tuple] = {}  # (name, args) -> (expires_at, result), oldest first
+        self.cache_max_entries = cache_max_entries
+        self.stats: Dict[str, ToolStats] = {}
 
+    def register(self, tool: Tool) -> Tool:
+        self._tools[tool.name] = tool
+        self.stats.setdefault(tool.name, ToolStats())
+        return tool
+
+    def tool(self, description: str, parameters: Optional[dict] = None,
+             timeout_s: float = DEFAULT_TOOL_TIMEOUT_S, cache_ttl_s: float = 0.0, name: Optional[str] = None):
+        """Decorator form of register()."""
+        def wrap(func):
+            self.register(Tool(
+                name=name or func.__name__,
+                func=func,
+                description=description,
+                parameters=parameters,
+                timeout_s=timeout_s,
+                cache_ttl_s=cache_ttl_s,
+            ))
+            return func
+        return wrap
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def config(self) -> list:
+        """Value for the live session config "tools" key."""
+        if not self._tools:
+            return []
+        return [{"function_declarations": [t.declaration() for t in self._tools.values()]}]
+
+    async def call(self, name: str, args: Optional[dict] = None) -> dict:
+        """
+        Run one tool call; always returns a response dict ({"result": ...} or {"error": ...}).
+        """
+        tool = self._tools.get(name)
+        if tool is None:
+            return {"error": f"unknown tool: {name}"}
+        stats = self.stats[name]
+        args = dict(args or {})
+
+        key = None
+        if tool.cache_ttl_s > 0:
+            key = (name, json.dumps(args, sort_keys=True, default=str))
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                stats.cache_hits += 1
+                return {"result": hit[1]}
+            if hit:
+                del self._cache[key]
+
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(tool.func):
+                result = await asyncio.wait_for(tool.func(**args), timeout=tool.timeout_s)
+            else:
+                # a timed-out thread keeps running, but the session stops waiting on it
+                result = await asyncio.wait_for(asyncio.to_thread(tool.func, **args), timeout=tool.timeout_s)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            stats.observe((time.perf_counter() - start) * 1000)
+            return {"error": f"{name} timed out after {tool.timeout_s}s"}
+        except Exception as e:
+            stats.errors += 1
+            stats.observe((time.perf_counter() - start) * 1000)
+            return {"error": f"{name} failed: {e}"}
+
+        stats.observe((time.perf_counter() - start) * 1000)
+        if key is not None:
+            self._cache_put(key, tool.cache_ttl_s, result)
+        return {"result": result}
+
+    def _cache_put(self, key: tuple, ttl_s: float, result: Any):
+        now = time.monotonic()
+        if len(self._cache) >= self.cache_max_entries:
+            # full: drop everything expired, then the oldest entries
+            for k in [k for k, (expires_at, _) in self._cache.items() if expires_at <= now]:
+                del self._cache[k]
+            while len(self._cache) >= self.cache_max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache.pop(key, None)  # re-insert as newest
+        self._cache[key] = (now + ttl_s, result)
+
+    def metrics(self) -> dict:
+        return {name: s.as_dict() for name, s in self.stats.items()}
+
+
+registry = ToolRegistry()
+
+
+# ---------------- Built-in tools ----------------
+@registry.tool(description="Use this function to get the current time.", timeout_s=1.0, cache_ttl_s=1.0)
 def get_current_time() -> str:
-    print(">>> TOOL EXECUTED: get_current_time()")
     return datetime.datetime.now().strftime("%I:%M %p")
-
-# This is a mapping of function names to the actual functions.
-# It helps us easily call the right function when the AI asks for it.
-AVAILABLE_TOOLS = {
-    "get_current_time": get_current_time,
-}
-
-GET_TIME_SCHEMA = Tool(
-    function_declarations=[
-        FunctionDeclaration(
-            name="get_current_time",
-            description="Use this function to get the current time.",
-            # This function takes no arguments, so parameters is an empty object.
-            parameters=Schema(
-                type="OBJECT",
-                properties={},
-            )
-        )
-    ]
-)
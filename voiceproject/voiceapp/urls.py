@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('sessions/', views.live_sessions, name='live_sessions'),
+]
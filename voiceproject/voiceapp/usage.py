@@ -0,0 +1,74 @@
+# voiceapp/usage.py
+"""
+Per-session resource accounting for AudioLoop.
+
+last_activity moves on transcribed speech (either side) and assistant audio, not on
+raw mic frames: an open mic streams silence too.
+
+cpu_s is approximate: thread CPU time spent in the session's own synchronous
+hot-path sections (ring copies, base64, payload encoding), not its awaits.
+
+gauges, when set, is a callable returning point-in-time readings (bytes held,
+queue depth) that as_dict() reports alongside the counters.
+"""
+
+import time
+
+
+class SessionUsage:
+    __slots__ = (
+        "started_at", "last_activity", "backend_connected_at", "backend_seconds",
+        "upstream_bytes", "upstream_frames", "downstream_bytes", "emitted_bytes",
+        "db_writes", "cpu_s", "gauges", "ended_reason",
+    )
+
+    def __init__(self):
+        now = time.time()
+        self.started_at = now
+        self.last_activity = now
+        self.backend_connected_at = None
+        self.backend_seconds = 0.0
+        self.upstream_bytes = 0      # browser -> server mic PCM
+        self.upstream_frames = 0
+        self.downstream_bytes = 0    # backend -> server TTS PCM
+        self.emitted_bytes = 0       # server -> browser PCM (after coalescing)
+        self.db_writes = 0
+        self.cpu_s = 0.0
+        self.gauges = None           # callable -> {"mem_bytes": ..., ...}, read on as_dict()
+        self.ended_reason = None
+
+    def backend_connected(self):
+        self.backend_connected_at = time.time()
+
+    def backend_closed(self):
+        if self.backend_connected_at is not None:
+            self.backend_seconds += time.time() - self.backend_connected_at
+            self.backend_connected_at = None
+
+    def total_bytes(self) -> int:
+        return self.upstream_bytes + self.downstream_bytes
+
+    def duration(self, now=None) -> float:
+        return (now or time.time()) - self.started_at
+
+    def idle_for(self, now=None) -> float:
+        return (now or time.time()) - self.last_activity
+
+    def as_dict(self) -> dict:
+        now = time.time()
+        backend = self.backend_seconds
+        if self.backend_connected_at is not None:
+            backend += now - self.backend_connected_at
+        return {
+            "duration_s": round(self.duration(now), 3),
+            "idle_s": round(self.idle_for(now), 3),
+            "backend_session_s": round(backend, 3),
+            "upstream_bytes": self.upstream_bytes,
+            "upstream_frames": self.upstream_frames,
+            "downstream_bytes": self.downstream_bytes,
+            "emitted_bytes": self.emitted_bytes,
+            "db_writes": self.db_writes,
+            "cpu_s": round(self.cpu_s, 6),
+            **(self.gauges() if self.gauges else {}),
+            "ended_reason": self.ended_reason,
+        }
@@ -2,9 +2,16 @@
 import asyncio
 import time
 import base64
+import json
+import logging
 from django.conf import settings
 from channels.layers import get_channel_layer
-from voiceapp.db_helpers import getlatest, gethistory, getsave_message
+from voiceapp import db_helpers
+from voiceapp import recording
+from voiceapp.audio_cache import ResponseAudioCache, response_key
+from voiceapp.tools import registry as tool_registry
+from voiceapp.ringbuffer import PcmFrame, PcmRing
+from voiceapp.usage import SessionUsage
 from google import genai
 
 # Try both locations for AGENT_PROMPT (project or app), fallback to settings
@@ -20,28 +27,68 @@ except Exception:
 SEND_RATE = 16000   # browser -> server mic
 RECV_RATE = 24000   # server -> browser TTS
 MODEL = "models/gemini-2.0-flash-exp"
+VOICE_NAME = "Puck"
+GREETING_REQUEST = "Start the conversation with a brief greeting and the first question."
+EMIT_CHUNK = 4800   # bytes of 24 kHz PCM16 per browser audio message
+GREETING_MIN_BYTES = RECV_RATE  # 0.5 s of 24 kHz PCM16; anything shorter isn't a real greeting
+GREETING_WARMUP_TIMEOUT_S = 30
+OUT_RING_BYTES = RECV_RATE * 2 * 2   # ~2 s of TTS PCM16 awaiting coalesced emit
 
 client = genai.Client(
     api_key=getattr(settings, "GEMINI_API_KEY", None),
     http_options={"api_version": "v1beta"},
 )
 
+logger = logging.getLogger(__name__)
+
+# Cached greeting/fixed-prompt audio (memory LRU + optional disk tier)
+response_cache = ResponseAudioCache(
+    max_bytes=getattr(settings, "VOICE_AUDIO_CACHE_MAX_BYTES", 8 * 1024 * 1024),
+    disk_dir=getattr(settings, "VOICE_AUDIO_CACHE_DIR", None),
+)
+
 # Silence windows (ms) to commit rolling transcripts
 USER_SILENCE_MS = 300
 ASSIST_SILENCE_MS = 250
 HEARTBEAT_PERIOD_S = 0.2
 
+# greeting cache key -> in-flight warm-up task (one per key per process)
+_greeting_warmups = {}
+
+
+def merge_transcript(current: str, incoming: str) -> str:
+    """Fold one output_transcription chunk into the turn's text (chunks may be deltas or cumulative)."""
+    if not incoming:
+        return current
+    if not current or incoming.startswith(current):
+        return incoming
+    if current.endswith(incoming):
+        return current
+    return current + incoming
+
 
 class AudioLoop:
 
-    def __init__(self, pya_instance, stdout, browser_mode=False, group_name="voice_transcripts"):
+    def __init__(self, pya_instance, stdout, browser_mode=False, group_name="voice_transcripts",
+                 recorder=None, connect=None, cache=response_cache, tools=tool_registry,
+                 store=db_helpers):
         self.stdout = stdout
         self.browser_mode = True  # force browser mode
         self.group_name = group_name
 
-        # Queues + state
+        # optional session recorder (see voiceapp.recording) + injectable backend connect
+        self.recorder = recorder
+        self._connect = connect or client.aio.live.connect
+        # transcript persistence: async getlatest / gethistory / getsave_message (db_helpers by default)
+        self.store = store
+
+        # Queues + state (to_send carries (pcm_bytes, mime_type) tuples)
         self.to_send = asyncio.Queue(maxsize=20)
+        self._carry = None
+        self._queued_bytes = 0
         self._stop = asyncio.Event()
+        self.usage = SessionUsage()
+        self.usage.gauges = self._gauges
 
         self.user_speaking = False
         self.bot_speaking = False
@@ -56,45 +103,106 @@ class AudioLoop:
         self.conversation_id = None
         self.channel_layer = get_channel_layer()
 
-        # browser playback coalescing
-        self._out_buf = bytearray()
+        # browser playback coalescing (pending span starts at _out_first)
+        self._out_ring = PcmRing(OUT_RING_BYTES)
+        self._out_first = None
+        self._out_len = 0
         self._last_emit = 0.0
 
+        # greeting cache (None disables): key for this prompt/voice, filled by a warm-up on a miss
+        self.cache = cache
+        self._greeting_key = response_key(AGENT_PROMPT, VOICE_NAME, GREETING_REQUEST, MODEL)
+        self._greeting_task = None
+
+        # tool calls run as tasks keyed by call id (None disables tools)
+        self.tools = tools
+        self._tool_tasks = {}
+
         self.session = None
 
+    # ---------------- Usage gauges ----------------
+    def _gauges(self):
+        # what this session holds right now: the TTS ring, mic audio awaiting upload, tool calls
+        return {
+            "mem_bytes": self._out_ring.capacity + self._queued_bytes,
+            "queued_frames": self.to_send.qsize() + (self._carry is not None),
+            "tool_tasks": len(self._tool_tasks),
+        }
+
     # ---------------- Channels helpers ----------------
     async def _broadcast(self, event: dict):
+        if self.recorder:
+            self.recorder.event(event)
         try:
             await self.channel_layer.group_send(self.group_name, event)
         except Exception:
             pass
 
+    @staticmethod
+    def _event(event_type: str, payload: dict, **fields) -> dict:
+        # payload is serialized once here; every consumer in the group relays the same string
+        return {"type": event_type, "json": json.dumps(payload, separators=(",", ":")), **fields}
+
     async def _broadcast_status(self, role: str, speaking: bool):
-        await self._broadcast({
-            "type": "status.message",
-            "role": role,
-            "speaking": speaking,
-        })
+        await self._broadcast(self._event(
+            "status.message",
+            {"type": "status", "role": role, "speaking": speaking},
+            role=role,
+            speaking=speaking,
+        ))
+
+    async def _broadcast_transcript(self, role: str, text: str):
+        await self._broadcast(self._event(
+            "transcript.message",
+            {"role": role, "text": text},
+            role=role,
+        ))
 
     # ---------------- Public API (used by your consumer) ----------------
     async def push_client_audio(self, pcm_bytes: bytes, mime_type: str = f"audio/pcm;rate={SEND_RATE}"):
         if not pcm_bytes:
             return
         self._last_user_audio_ts = time.time()
+        # no usage.last_activity here: an open mic streams even silence, so idle is
+        # measured from transcribed speech and assistant audio instead
+        usage = self.usage
+        usage.upstream_bytes += len(pcm_bytes)
+        usage.upstream_frames += 1
+        if self.recorder:
+            self.recorder.audio(recording.MIC, pcm_bytes, mime_type)
         if not self.user_speaking:
             self.user_speaking = True
             await self._broadcast_status("user", True)
-        await self.to_send.put({"data": pcm_bytes, "mime_type": mime_type})
+        self._queued_bytes += len(pcm_bytes)
+        await self.to_send.put((pcm_bytes, mime_type))
 
     async def stop(self):
         self._stop.set()
 
     # ---------------- Internal: Gemini I/O ----------------
+    async def _send_next(self):
+        # send the next frame plus any frames already queued behind it as one chunk
+        data, mime_type = self._carry or await self.to_send.get()
+        self._carry = None
+        if not self.to_send.empty():
+            chunks = [data]
+            while not self.to_send.empty():
+                nxt = self.to_send.get_nowait()
+                if nxt[1] != mime_type:
+                    self._carry = nxt
+                    break
+                chunks.append(nxt[0])
+            if len(chunks) > 1:
+                cpu0 = time.thread_time()
+                data = b"".join(chunks)
+                self.usage.cpu_s += time.thread_time() - cpu0
+        self._queued_bytes -= len(data)
+        await self.session.send(input={"data": data, "mime_type": mime_type})
+
     async def _gemini_sender(self):
         while not self._stop.is_set():
             try:
-                item = await self.to_send.get()
-                await self.session.send(input=item)
+                await self._send_next()
             except asyncio.CancelledError:
                 break
             except Exception:
@@ -104,6 +212,13 @@ class AudioLoop:
         while not self._stop.is_set():
             try:
                 async for resp in self.session.receive():
+                    tool_call = getattr(resp, "tool_call", None)
+                    if tool_call:
+                        self._start_tool_calls(tool_call)
+                    cancellation = getattr(resp, "tool_call_cancellation", None)
+                    if cancellation:
+                        self._cancel_tool_calls(getattr(cancellation, "ids", None) or [])
+
                     sc = getattr(resp, "server_content", None)
                     if not sc:
                         continue
@@ -111,22 +226,20 @@ class AudioLoop:
                     # Rolling input (user) transcript
                     input_trans = getattr(sc, "input_transcription", None)
                     if input_trans and getattr(input_trans, "text", None):
+                        self.usage.last_activity = time.time()
                         self.user_text = (input_trans.text or "").strip()
-                        await self._broadcast({
-                            "type": "transcript.message",
-                            "role": "user",
-                            "text": self.user_text,
-                        })
+                        if self.recorder:
+                            self.recorder.text(recording.IN_TEXT, input_trans.text)
+                        await self._broadcast_transcript("user", self.user_text)
 
                     # Rolling output (assistant) transcript
                     output_trans = getattr(sc, "output_transcription", None)
                     if output_trans and getattr(output_trans, "text", None):
+                        self.usage.last_activity = time.time()
                         self.assistant_text = (output_trans.text or "").strip()
-                        await self._broadcast({
-                            "type": "transcript.message",
-                            "role": "assistant",
-                            "text": self.assistant_text,
-                        })
+                        if self.recorder:
+                            self.recorder.text(recording.OUT_TEXT, output_trans.text)
+                        await self._broadcast_transcript("assistant", self.assistant_text)
 
                     # Audio chunks from model (TTS)
                     mt = getattr(sc, "model_turn", None)
@@ -138,13 +251,19 @@ class AudioLoop:
                             data = getattr(blob, "data", None)
                             if not data:
                                 continue
+                            cpu0 = time.thread_time()
                             audio = data if isinstance(data, bytes) else base64.b64decode(data)
+                            self.usage.cpu_s += time.thread_time() - cpu0
+                            self.usage.downstream_bytes += len(audio)
+                            if self.recorder:
+                                self.recorder.audio(recording.TTS, audio, getattr(blob, "mime_type", None))
 
                             if not self.bot_speaking:
                                 self.bot_speaking = True
                                 await self._broadcast_status("assistant", True)
 
                             self._last_tts_audio_ts = time.time()
+                            self.usage.last_activity = self._last_tts_audio_ts
                             await self._emit_audio_to_clients(audio)
 
                 await asyncio.sleep(0.02)
@@ -153,28 +272,140 @@ class AudioLoop:
             except Exception:
                 await asyncio.sleep(0.08)
 
+    # ---------------- Tool calls (off the receive path) ----------------
+    def _start_tool_calls(self, tool_call):
+        for fc in getattr(tool_call, "function_calls", None) or []:
+            task = asyncio.create_task(self._run_tool(fc))
+            self._tool_tasks[fc.id] = task
+            task.add_done_callback(lambda _t, call_id=fc.id: self._tool_tasks.pop(call_id, None))
+
+    def _cancel_tool_calls(self, ids):
+        for call_id in ids:
+            task = self._tool_tasks.pop(call_id, None)
+            if task:
+                task.cancel()
+
+    async def _run_tool(self, fc):
+        if self.tools and fc.name in self.tools:
+            response = await self.tools.call(fc.name, fc.args)
+        else:
+            response = {"error": f"unknown tool: {fc.name}"}
+        try:
+            await self.session.send_tool_response(function_responses=[{
+                "id": fc.id,
+                "name": fc.name,
+                "response": response,
+            }])
+        except Exception as e:
+            if self.stdout:
+                self.stdout.write(f"[tool] failed to send {fc.name} response: {e}\n")
+
     # ---------------- Emit audio to browser (24 kHz PCM) ----------------
-    async def _emit_audio_to_clients(self, pcm_bytes: bytes):
+    async def _emit_audio_to_clients(self, pcm_bytes: bytes, flush: bool = False):
         # coalesce small chunks for smoother playback
-        self._out_buf += pcm_bytes
+        frame = self._out_ring.write(pcm_bytes)
+        if frame is None:
+            # ring full (or chunk bigger than it): emit what is pending, then retry
+            await self._flush_audio()
+            frame = self._out_ring.write(pcm_bytes) or PcmFrame.detached(pcm_bytes)
+        if self._out_first is None:
+            self._out_first = frame
+        self._out_len += frame.length
+
         elapsed = time.time() - (self._last_emit or 0.0)
-        if len(self._out_buf) >= 4800 or elapsed > 0.2:
-            b64 = base64.b64encode(self._out_buf).decode("ascii")
-            await self._broadcast({
-                "type": "audio.message",
-                "mime": f"audio/pcm;rate={RECV_RATE}",
-                "data": b64,
-            })
-            self._out_buf = bytearray()
-            self._last_emit = time.time()
+        if flush or self._out_len >= EMIT_CHUNK or elapsed > 0.2:
+            await self._flush_audio()
+
+    async def _flush_audio(self):
+        if self._out_first is None:
+            return
+        cpu0 = time.thread_time()
+        n = self._out_len
+        b64 = base64.b64encode(self._out_ring.view(self._out_first, n)).decode("ascii")
+        self._out_ring.clear()
+        self._out_first = None
+        self._out_len = 0
+        event = self._event(
+            "audio.message",
+            {"type": "audio", "mime": f"audio/pcm;rate={RECV_RATE}", "data": b64, "rate": RECV_RATE},
+            bytes=n,
+        )
+        self.usage.cpu_s += time.thread_time() - cpu0
+        self.usage.emitted_bytes += n
+        await self._broadcast(event)
+        self._last_emit = time.time()
+
+    # ---------------- Greeting cache ----------------
+    async def _play_cached_greeting(self, entry):
+        # stream cached greeting while the live session is still connecting
+        self.bot_speaking = True
+        await self._broadcast_status("assistant", True)
+        self.assistant_text = entry.text
+        await self._broadcast_transcript("assistant", entry.text)
+        audio = memoryview(entry.audio)
+        for i in range(0, len(audio), EMIT_CHUNK):
+            self._last_tts_audio_ts = time.time()
+            await self._emit_audio_to_clients(audio[i:i + EMIT_CHUNK], flush=True)
+
+    def _warm_greeting(self):
+        # the cached greeting is replayed to every later session, so it is generated on its
+        # own history-free connection rather than captured from this customer's session
+        key = self._greeting_key
+        task = _greeting_warmups.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._capture_greeting(key))
+            _greeting_warmups[key] = task
+            task.add_done_callback(lambda _t: _greeting_warmups.pop(key, None))
+        return task
+
+    async def _capture_greeting(self, key):
+        audio = bytearray()
+        text = ""
+        try:
+            config = self._session_config(AGENT_PROMPT.strip(), tools=False)
+            async with self._connect(model=MODEL, config=config) as session:
+                await session.send(input={"text": GREETING_REQUEST})
+
+                async def read_turn():
+                    nonlocal text
+                    async for resp in session.receive():
+                        sc = getattr(resp, "server_content", None)
+                        if not sc:
+                            continue
+                        out = getattr(sc, "output_transcription", None)
+                        if out and getattr(out, "text", None):
+                            text = merge_transcript(text, out.text)
+                        mt = getattr(sc, "model_turn", None)
+                        for part in getattr(mt, "parts", None) or []:
+                            blob = getattr(part, "inline_data", None) or getattr(part, "inlineData", None)
+                            data = getattr(blob, "data", None) if blob else None
+                            if data:
+                                audio.extend(data if isinstance(data, bytes) else base64.b64decode(data))
+                        # cache only a turn the model finished, never a cut-off one
+                        if getattr(sc, "interrupted", False):
+                            return False
+                        if getattr(sc, "turn_complete", False):
+                            return True
+                    return False
+
+                complete = await asyncio.wait_for(read_turn(), GREETING_WARMUP_TIMEOUT_S)
+        except Exception:
+            logger.warning("Greeting warm-up failed", exc_info=True)
+            return False
+        text = text.strip()
+        if not complete or len(audio) < GREETING_MIN_BYTES or not text:
+            return False
+        self.cache.put(key, bytes(audio), text, f"audio/pcm;rate={RECV_RATE}")
+        return True
 
     # ---------------- Commit transcripts (optional persistence) ----------------
     async def _commit_user_if_ready(self):
         text = (self.user_text or "").strip()
         if text and text != self._saved_user_text:
             try:
-                await getsave_message(self.conversation_id, "user", text)
+                await self.store.getsave_message(self.conversation_id, "user", text)
                 self._saved_user_text = text
+                self.usage.db_writes += 1
             except Exception:
                 pass
 
@@ -182,8 +413,9 @@ class AudioLoop:
         text = (self.assistant_text or "").strip()
         if text and text != self._saved_assistant_text:
             try:
-                await getsave_message(self.conversation_id, "assistant", text)
+                await self.store.getsave_message(self.conversation_id, "assistant", text)
                 self._saved_assistant_text = text
+                self.usage.db_writes += 1
             except Exception:
                 pass
 
@@ -209,37 +441,56 @@ class AudioLoop:
             await asyncio.sleep(HEARTBEAT_PERIOD_S)
 
     # ---------------- Main loop ----------------
+    def _session_config(self, instruction, tools=True):
+        return {
+            "generation_config": {"response_modalities": ["AUDIO"]},
+            "speech_config": {
+                "voice_config": {"prebuilt_voice_config": {"voice_name": VOICE_NAME}}
+            },
+            "input_audio_transcription": {},
+            "output_audio_transcription": {},
+            "tools": self.tools.config() if tools and self.tools else [],
+            "system_instruction": {
+                "parts": [
+                    {
+                        "text": instruction
+                    }
+                ]
+            },
+        }
+
     async def run(self):
         try:
-            self.conversation_id = await getlatest()
+            greeting = self.cache.get(self._greeting_key) if self.cache else None
+            if greeting:
+                self._greeting_task = asyncio.create_task(self._play_cached_greeting(greeting))
+
+            self.conversation_id = await self.store.getlatest()
             if self.stdout:
                 self.stdout.write(f"📝 Session ID: {self.conversation_id}\n")
 
-            history = await gethistory(self.conversation_id)
-
-            config = {
-                "generation_config": {"response_modalities": ["AUDIO"]},
-                "speech_config": {
-                    "voice_config": {"prebuilt_voice_config": {"voice_name": "Puck"}}
-                },
-                "input_audio_transcription": {},
-                "output_audio_transcription": {},
-                "system_instruction": {
-                    "parts": [
-                        {
-                            "text": f"{AGENT_PROMPT.strip()}\n\n{history}\n\nNow continue the conversation naturally."
-                        }
-                    ]
-                },
-            }
-
-            async with client.aio.live.connect(model=MODEL, config=config) as session:
+            history = await self.store.gethistory(self.conversation_id)
+
+            instruction = f"{AGENT_PROMPT.strip()}\n\n{history}\n\nNow continue the conversation naturally."
+            if greeting:
+                instruction += (
+                    f"\n\nYou have already greeted the customer with: \"{greeting.text}\" "
+                    "Do not greet again; wait for their reply."
+                )
+
+            config = self._session_config(instruction)
+
+            async with self._connect(model=MODEL, config=config) as session:
                 self.session = session
-                try:
-                    await self.session.send(input={"text": "Start the conversation with a brief greeting and the first question."})
-                except Exception as e:
-                    if self.stdout:
-                        self.stdout.write(f"[init] failed to request first response: {e}\n")
+                self.usage.backend_connected()
+                if not greeting:
+                    if self.cache:
+                        self._warm_greeting()
+                    try:
+                        await self.session.send(input={"text": GREETING_REQUEST})
+                    except Exception as e:
+                        if self.stdout:
+                            self.stdout.write(f"[init] failed to request first response: {e}\n")
                 if self.stdout:
                     self.stdout.write("💬 Voice chat started — browser mode.\n")
 
@@ -249,6 +500,7 @@ class AudioLoop:
                     asyncio.create_task(self._status_heartbeat()),
                 ]
                 await self._stop.wait()
+                tasks += list(self._tool_tasks.values())
                 for t in tasks:
                     t.cancel()
                 await asyncio.gather(*tasks, return_exceptions=True)
@@ -257,10 +509,21 @@ class AudioLoop:
             if self.stdout:
                 self.stdout.write(f"💥 Run error: {e}\n")
         finally:
+            self.usage.backend_closed()
+            if self._greeting_task:
+                self._greeting_task.cancel()
             try:
                 await self._commit_user_if_ready()
                 await self._commit_assistant_if_ready()
             except Exception:
                 pass
+            if self.recorder:
+                self.recorder.close()
+            logger.info("Voice session %s usage: %s", self.group_name, self.usage.as_dict())
+            if self.tools:
+                logger.info("Voice session %s tool metrics: %s", self.group_name, self.tools.metrics())
             if self.stdout:
+                if self.tools:
+                    self.stdout.write(f"🔧 Tool metrics: {self.tools.metrics()}\n")
+                self.stdout.write(f"📊 Usage: {self.usage.as_dict()}\n")
                 self.stdout.write("👋 Session ended.\n")
\ No newline at end of file
@@ -1,3 +1,22 @@
-from django.shortcuts import render
+from django.http import JsonResponse
 
-# Create your views here.
+from .sessions import LIVE_SESSIONS, observer_allowed, quota_limits
+from .tools import registry as tool_registry
+
+
+def live_sessions(request):
+    """Live session ids (for ws/voice/observe/<id>/) with their start times and resource usage, plus tool latency."""
+    if not observer_allowed(request.user):
+        return JsonResponse({"error": "forbidden"}, status=403)
+    return JsonResponse({
+        "sessions": [
+            {
+                "id": sid,
+                "started_at": live.started_at,
+                "usage": live.usage.as_dict() if live.usage else None,
+            }
+            for sid, live in sorted(LIVE_SESSIONS.items(), key=lambda kv: kv[1].started_at)
+        ],
+        "limits": quota_limits(),
+        "tools": tool_registry.metrics(),
+    })
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import django
 from dotenv import load_dotenv
 import mimetypes
 
@@ -15,6 +16,26 @@ load_dotenv(ENV_PATH)
 
 # Get API key
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# Optional: record every voice session (mic/TTS PCM + events) under this dir for offline replay
+VOICE_RECORD_DIR = os.environ.get("VOICE_RECORD_DIR")
+
+# Greeting audio cache: in-memory LRU budget + on-disk tier (keys include the prompt hash and voice)
+VOICE_AUDIO_CACHE_DIR = BASE_DIR / "audio_cache"
+VOICE_AUDIO_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Supervisors: ws/voice/observe/<session_id>/ and /voice/sessions/ require a staff login
+VOICE_OBSERVERS_REQUIRE_STAFF = True
+
+# Transcript retention (python manage.py compact_transcripts): idle conversations older than this are archived
+VOICE_RETENTION_DAYS = 30
+VOICE_ARCHIVE_DIR = BASE_DIR / "archive"
+
+# Per-session quotas, enforced by the reaper in voiceapp/sessions.py (0/None disables a limit)
+VOICE_SESSION_MAX_DURATION_S = 30 * 60
+VOICE_SESSION_MAX_IDLE_S = 120
+VOICE_SESSION_MAX_BYTES = None
+VOICE_SESSION_REAP_INTERVAL_S = 5
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -89,6 +110,20 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite production profile (VOICE_SQLITE_TUNED=1 in .env):
+# WAL + synchronous=NORMAL + busy timeout (voiceapp/sqlite_profile.py), persistent
+# connections, and every transcript write funnelled through one writer thread.
+VOICE_SQLITE_TUNED = os.environ.get("VOICE_SQLITE_TUNED", "").lower() in ("1", "true", "yes")
+VOICE_DB_WRITER = VOICE_SQLITE_TUNED
+if VOICE_SQLITE_TUNED:
+    DATABASES['default']['CONN_MAX_AGE'] = None
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    # timeout = busy wait (s); IMMEDIATE takes the write lock at BEGIN so a read-then-write
+    # transaction can't fail its lock upgrade across processes
+    DATABASES['default']['OPTIONS'] = {'timeout': 20}
+    if django.VERSION >= (5, 1):
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,4 +164,16 @@ STATIC_URL = '/static/'
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# voiceapp logs session usage, tool metrics and reaped sessions at INFO
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'voiceapp': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
\ No newline at end of file
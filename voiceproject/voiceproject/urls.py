@@ -6,6 +6,7 @@ from django.conf import settings
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('chatapp/', include('chatapp.urls')),
+    path('voice/', include('voiceapp.urls')),
     path('voice-assistant/', views.voice_assistant_view, name='voice_assistant'),  # Included URL path
 ]
 